@@ -0,0 +1,84 @@
+"""
+Recall and memory of the compressed action stores vs. exact float32 search.
+
+  - recall@k vs exact: overlap of each query's compressed top-k with its exact top-k
+    (queries = all strategies + all actions)
+  - gold recall@k: share of evaluation/gold_mapping.csv pairs found in each strategy's
+    top-k, for the exact index and for each compressed store
+
+The real corpus is small, so --scale pads the index with jittered copies of the
+action vectors (ids "syn-...") to show memory and recall at a realistic size.
+
+    python benchmarks/bench_compression.py [--k 10] [--m 96 48] [--scale 50000]
+"""
+from pathlib import Path
+import argparse
+import json
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np  # noqa: E402
+from embeddings import embed_texts  # noqa: E402
+from gold_labels import load_gold_pairs  # noqa: E402
+from vector_compress import CompressedStore, normalize  # noqa: E402
+
+def load_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def gold_recall(strategy_ids, topk_ids, gold):
+    found = {(sid, aid) for sid, ids in zip(strategy_ids, topk_ids) for aid in ids}
+    return len(found & gold) / max(len(gold), 1)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--m", type=int, nargs="+", default=[96, 48])
+    ap.add_argument("--scale", type=int, default=0, help="Total index size incl. synthetic rows")
+    ap.add_argument("--shortlist", type=int, default=None, help="Rows re-scored in full precision")
+    ap.add_argument("--queries", type=int, default=1000, help="Max queries used for recall vs exact")
+    args = ap.parse_args()
+
+    actions = load_jsonl("data/processed/actions.jsonl")
+    strategies = load_jsonl("data/processed/strategies.jsonl")
+    ids = [a["action_id"] for a in actions]
+    a_vecs = normalize(embed_texts([a["text"] for a in actions]))
+    s_vecs = normalize(embed_texts([s["text"] for s in strategies]))
+    s_ids = [s["strategy_id"] for s in strategies]
+    queries = np.vstack([s_vecs, a_vecs])[:max(args.queries, len(s_ids))]
+
+    if args.scale > len(ids):
+        rng = np.random.default_rng(0)
+        n_syn = args.scale - len(ids)
+        base = a_vecs[rng.integers(0, len(ids), size=n_syn)]
+        syn = normalize(base + rng.normal(0, 0.03, size=base.shape).astype(np.float32))
+        a_vecs = np.vstack([a_vecs, syn])
+        ids = ids + [f"syn-{i}" for i in range(n_syn)]
+    k = min(args.k, len(ids))
+
+    exact = np.argsort(-(queries @ a_vecs.T), axis=1, kind="stable")[:, :k]
+    exact_ids = [[ids[r] for r in row] for row in exact]
+    gold = load_gold_pairs()
+    full_bytes = a_vecs.nbytes
+
+    print(f"{len(ids)} actions x {a_vecs.shape[1]}d, {len(queries)} queries, k={k}")
+    print(f"{'store':<10}{'KiB':>9}{'ratio':>8}{'recall@k':>10}{'gold R@k':>10}{'ms/query':>10}")
+    print(f"{'float32':<10}{full_bytes / 1024:>9.1f}{1.0:>8.1f}{1.0:>10.3f}"
+          f"{gold_recall(s_ids, exact_ids[:len(s_ids)], gold):>10.3f}{'-':>10}")
+
+    configs = [("sq8", None)] + [("pq", m) for m in args.m if a_vecs.shape[1] % m == 0]
+    for method, m in configs:
+        store = CompressedStore.build(ids, a_vecs, method, m=m or 96)
+        t0 = time.perf_counter()
+        got, _ = store.search(queries, k=k, shortlist=args.shortlist)
+        ms = (time.perf_counter() - t0) * 1000 / len(queries)
+
+        recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(got, exact_ids)])
+        name = method if m is None else f"pq{m}"
+        print(f"{name:<10}{store.memory_bytes() / 1024:>9.1f}{full_bytes / store.memory_bytes():>8.1f}"
+              f"{recall:>10.3f}{gold_recall(s_ids, got[:len(s_ids)], gold):>10.3f}{ms:>10.3f}")
+
+if __name__ == "__main__":
+    main()
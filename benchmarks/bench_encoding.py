@@ -0,0 +1,57 @@
+"""
+Encoding throughput: single-process SentenceTransformer.encode (the old path)
+vs. the multi-process EncodingPool. Bypasses the embedding cache.
+
+    python benchmarks/bench_encoding.py [--n 20000] [--workers N] [--threads T]
+"""
+from pathlib import Path
+import argparse
+import json
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np  # noqa: E402
+from config import EMBED_MODEL, ENCODE_THREADS_PER_WORKER  # noqa: E402
+from encode_pool import EncodingPool, auto_batch_size, default_workers  # noqa: E402
+
+def load_texts(n):
+    """Action texts from actions.jsonl, repeated (with a suffix so none are identical) up to n."""
+    base = []
+    with open("data/processed/actions.jsonl", "r", encoding="utf-8") as f:
+        for line in f:
+            base.append(json.loads(line)["text"])
+    return [f"{base[i % len(base)]} ({i // len(base)})" for i in range(n)]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=5000)
+    ap.add_argument("--threads", type=int, default=ENCODE_THREADS_PER_WORKER)
+    ap.add_argument("--workers", type=int, default=None)
+    args = ap.parse_args()
+
+    texts = load_texts(args.n)
+    workers = args.workers or default_workers(args.threads)
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(EMBED_MODEL, device="cpu")
+    t0 = time.perf_counter()
+    ref = model.encode(texts, show_progress_bar=False)
+    single = time.perf_counter() - t0
+    print(f"single process (default batch 32): {len(texts) / single:8.1f} docs/s")
+
+    with EncodingPool(workers=workers, threads_per_worker=args.threads) as pool:
+        pool.encode(texts[:workers * 4])   # warm up: workers load the model
+        t0 = time.perf_counter()
+        vecs = pool.encode(texts)
+        pooled = time.perf_counter() - t0
+    print(f"pool {workers}x{args.threads} threads, batch {pool.batch_size}: "
+          f"{len(texts) / pooled:8.1f} docs/s  ({single / pooled:.2f}x)")
+
+    cos = np.sum(ref * vecs, axis=1) / (np.linalg.norm(ref, axis=1) * np.linalg.norm(vecs, axis=1))
+    print(f"min cosine vs single-process vectors: {cos.min():.6f}")
+    print(f"auto batch size (1 worker): {auto_batch_size()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Exact NumPy search (exact_search.ExactIndex) vs. Chroma HNSW on the same vectors.
+
+Both indexes are built from the action vectors in a temporary directory, so the
+project's db_chroma is not touched. The exact index is built twice: flat (filters
+become row masks) and partitioned on config.PARTITION_FIELDS (an equality filter
+scans only its partition). Reports, for all strategies as one batch:
+  - latency of one multi-query call (unfiltered, goal_no filter, csp_ref filter)
+  - recall@k of Chroma's results against the exact top-k
+
+--scale pads the corpus with jittered copies of the action vectors (ids "syn-...",
+metadata copied from the source action) to show the crossover at a realistic size.
+
+    python benchmarks/bench_exact.py [--k 10] [--scale 30000] [--repeat 5]
+"""
+from pathlib import Path
+import argparse
+import json
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np  # noqa: E402
+import chromadb  # noqa: E402
+from embeddings import embed_texts  # noqa: E402
+from config import PARTITION_FIELDS  # noqa: E402
+from exact_search import ExactIndex, normalize, partition_order  # noqa: E402
+from vector_index import action_metadata  # noqa: E402
+
+def load_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def best_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    return min(times) * 1000, out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--scale", type=int, default=0, help="Total index size incl. synthetic rows")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    actions = load_jsonl("data/processed/actions.jsonl")
+    strategies = load_jsonl("data/processed/strategies.jsonl")
+    ids = [a["action_id"] for a in actions]
+    metas = [action_metadata(a) for a in actions]
+    vecs = normalize(embed_texts([a["text"] for a in actions]))
+    queries = normalize(embed_texts([s["text"] for s in strategies]))
+    goal = strategies[0].get("goal_no")
+    csp_ref = actions[0].get("csp_ref")
+
+    if args.scale > len(ids):
+        rng = np.random.default_rng(0)
+        n_syn = args.scale - len(ids)
+        src = rng.integers(0, len(ids), size=n_syn)
+        syn = normalize(vecs[src] + rng.normal(0, 0.03, size=(n_syn, vecs.shape[1])).astype(np.float32))
+        vecs = np.vstack([vecs, syn])
+        metas = metas + [metas[j] for j in src]
+        ids = ids + [f"syn-{i}" for i in range(n_syn)]
+    k = min(args.k, len(ids))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client = chromadb.PersistentClient(path=str(Path(tmp) / "chroma"))
+        col = client.create_collection(name="bench_actions", embedding_function=None)
+        step = client.get_max_batch_size()
+        t0 = time.perf_counter()
+        for i in range(0, len(ids), step):
+            col.add(ids=ids[i:i+step], embeddings=vecs[i:i+step], metadatas=metas[i:i+step])
+        chroma_build = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        ExactIndex(ids, vecs, metadatas=metas).save(Path(tmp) / "exact")
+        flat = ExactIndex.load(Path(tmp) / "exact")
+        flat_build = time.perf_counter() - t0
+
+        # partitioned: rows sorted by PARTITION_FIELDS, as ExactIndex.from_collection does
+        t0 = time.perf_counter()
+        order = partition_order(metas, PARTITION_FIELDS)
+        ExactIndex([ids[j] for j in order], vecs[order], metadatas=[metas[j] for j in order],
+                   partition_fields=PARTITION_FIELDS).save(Path(tmp) / "exact_part")
+        part = ExactIndex.load(Path(tmp) / "exact_part")
+        part_build = time.perf_counter() - t0
+
+        print(f"{len(ids)} actions x {vecs.shape[1]}d, {len(queries)} strategy queries per call, k={k}")
+        print(f"build: chroma {chroma_build:.2f}s, exact flat {flat_build:.2f}s, "
+              f"exact partitioned {part_build:.2f}s")
+        print(f"{'filter':<16}{'chroma ms':>11}{'flat ms':>9}{'part ms':>9}{'flat x':>8}{'part x':>8}"
+              f"{'chroma R@k':>12}")
+
+        filters = (("none", None), (f"goal_no={goal}", {"goal_no": goal}),
+                   (f"csp_ref={csp_ref}", {"csp_ref": csp_ref}))
+        for label, where in filters:
+            # masks / partitions are built once per filter and reused, as in the scripts
+            flat.mask(where)
+            part.plan(where)
+            c_ms, c_res = best_ms(lambda: col.query(query_embeddings=queries, n_results=k, where=where,
+                                                    include=["distances"]), args.repeat)
+            f_ms, f_res = best_ms(lambda: flat.query(queries, n_results=k, where=where,
+                                                     include=["distances"]), args.repeat)
+            p_ms, p_res = best_ms(lambda: part.query(queries, n_results=k, where=where,
+                                                     include=["distances"]), args.repeat)
+            # the two exact variants must return the same sets (ties may be ordered differently)
+            same = all(set(a) == set(b) for a, b in zip(f_res["ids"], p_res["ids"]))
+            recall = np.mean([len(set(c) & set(e)) / max(len(e), 1)
+                              for c, e in zip(c_res["ids"], f_res["ids"])])
+            print(f"{label:<16}{c_ms:>11.2f}{f_ms:>9.2f}{p_ms:>9.2f}{c_ms / f_ms:>8.1f}{c_ms / p_ms:>8.1f}"
+                  f"{recall:>12.3f}" + ("" if same else "   [WARN] flat and partitioned top-k differ"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Extraction throughput per PDF backend on our plan PDFs.
+
+Each backend runs in a fresh (spawned) process so its peak RSS is measured on
+its own; pages are counted with the backend's own library, so no other PDF
+library is loaded in that process. The extracted text is fed through
+03_make_actions.py's row parser to check that a faster backend still yields the
+same number of actions.
+
+    python benchmarks/bench_extract.py [data/raw] [--backends pypdf pypdfium2 pdfplumber]
+"""
+from pathlib import Path
+import argparse
+import importlib
+import multiprocessing as mp
+import resource
+import sys
+import time
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC))
+
+from pdf_backends import BACKENDS, extract_texts, page_count  # noqa: E402
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def run_backend(backend, pdf_paths, queue):
+    sys.path.insert(0, str(SRC))
+    make_actions = importlib.import_module("03_make_actions")
+
+    n_pages = 0
+    n_actions = 0
+    elapsed = 0.0
+    for pdf_path in pdf_paths:
+        page_indices = range(page_count(str(pdf_path), backend))
+        t0 = time.perf_counter()
+        pages = extract_texts(str(pdf_path), page_indices, backend=backend)
+        elapsed += time.perf_counter() - t0
+
+        n_pages += len(pages)
+        for i, text in pages:
+            n_actions += len(make_actions.parse_actions_from_page(text, i, pdf_path.name))
+
+    queue.put({
+        "backend": backend,
+        "pages": n_pages,
+        "seconds": elapsed,
+        "pages_per_sec": n_pages / elapsed if elapsed else float("inf"),
+        "peak_rss_mb": peak_rss_mb(),
+        "actions": n_actions,
+    })
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("source", nargs="?", default="data/raw", help="Directory of PDFs")
+    ap.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    args = ap.parse_args()
+
+    pdf_paths = sorted(Path(args.source).glob("*.pdf"))
+    if not pdf_paths:
+        raise FileNotFoundError(f"No PDFs in {args.source}")
+
+    ctx = mp.get_context("spawn")
+    results = []
+    for backend in args.backends:
+        q = ctx.Queue()
+        proc = ctx.Process(target=run_backend, args=(backend, pdf_paths, q))
+        proc.start()
+        results.append(q.get())
+        proc.join()
+
+    print(f"PDFs: {', '.join(p.name for p in pdf_paths)}")
+    print(f"{'backend':<12}{'pages':>8}{'sec':>9}{'pages/s':>10}{'peak MB':>10}{'actions':>9}")
+    for r in results:
+        print(f"{r['backend']:<12}{r['pages']:>8}{r['seconds']:>9.2f}{r['pages_per_sec']:>10.1f}"
+              f"{r['peak_rss_mb']:>10.1f}{r['actions']:>9}")
+
+    baseline = results[0]
+    for r in results[1:]:
+        if r["actions"] != baseline["actions"]:
+            print(f"[WARN] {r['backend']} parsed {r['actions']} actions vs "
+                  f"{baseline['actions']} with {baseline['backend']}")
+        else:
+            print(f"[OK] {r['backend']} parses the same number of actions as {baseline['backend']}")
+
+if __name__ == "__main__":
+    main()
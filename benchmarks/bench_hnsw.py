@@ -0,0 +1,132 @@
+"""
+HNSW parameter sweep: recall@k against exact search vs. query latency and build time.
+
+The action vectors are padded to --scale rows with jittered copies,
+then for every (M, ef_construction) pair a fresh Chroma collection is built in a
+temporary directory, and every ef_search value is queried on it. Queries are the
+strategies plus jittered action vectors, issued one at a time like the dashboard does.
+
+Writes outputs/bench_hnsw.csv and, when plotly is installed, outputs/bench_hnsw.html
+(recall@k vs p50 latency, one point per configuration, marker size = build time).
+
+    python benchmarks/bench_hnsw.py [--scale 30000] [--k 10] [--M 8 16 32]
+                                    [--efc 64 100 200] [--efs 10 20 50 100 200]
+    python benchmarks/bench_hnsw.py --profiles       # only the profiles in config.HNSW_PROFILES
+"""
+from pathlib import Path
+import argparse
+import json
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import chromadb  # noqa: E402
+from config import HNSW_PROFILES  # noqa: E402
+from embeddings import embed_texts  # noqa: E402
+from exact_search import normalize  # noqa: E402
+from vector_index import hnsw_configuration  # noqa: E402
+
+def load_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def corpus(scale, n_queries, seed=0):
+    actions = load_jsonl("data/processed/actions.jsonl")
+    strategies = load_jsonl("data/processed/strategies.jsonl")
+    vecs = normalize(embed_texts([a["text"] for a in actions]))
+    rng = np.random.default_rng(seed)
+    if scale > len(vecs):
+        base = vecs[rng.integers(0, len(vecs), size=scale - len(vecs))]
+        vecs = np.vstack([vecs, normalize(base + rng.normal(0, 0.03, size=base.shape).astype(np.float32))])
+    ids = [f"r{i}" for i in range(len(vecs))]
+
+    queries = normalize(embed_texts([s["text"] for s in strategies]))
+    extra = max(n_queries - len(queries), 0)
+    if extra:
+        base = vecs[rng.integers(0, len(vecs), size=extra)]
+        queries = np.vstack([queries, normalize(base + rng.normal(0, 0.05, size=base.shape).astype(np.float32))])
+    return ids, vecs, queries[:max(n_queries, 1)]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scale", type=int, default=30000, help="Total index size incl. synthetic rows")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--M", type=int, nargs="+", default=[8, 16, 32])
+    ap.add_argument("--efc", type=int, nargs="+", default=[64, 100, 200])
+    ap.add_argument("--efs", type=int, nargs="+", default=[10, 20, 50, 100, 200])
+    ap.add_argument("--profiles", action="store_true", help="Sweep config.HNSW_PROFILES instead of the grid")
+    ap.add_argument("--out", default="outputs/bench_hnsw")
+    args = ap.parse_args()
+
+    ids, vecs, queries = corpus(args.scale, args.queries)
+    k = min(args.k, len(ids))
+    exact = np.argsort(-(queries @ vecs.T), axis=1, kind="stable")[:, :k]
+    exact_sets = [{ids[r] for r in row} for row in exact]
+    print(f"{len(ids)} vectors x {vecs.shape[1]}d, {len(queries)} queries, k={k}")
+
+    if args.profiles:
+        builds = {}
+        for name, p in HNSW_PROFILES.items():
+            builds.setdefault((p["M"], p["ef_construction"]), []).append((p["ef_search"], name))
+    else:
+        builds = {(m, efc): [(efs, "") for efs in args.efs] for m in args.M for efc in args.efc}
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        client = chromadb.PersistentClient(path=tmp)
+        step = client.get_max_batch_size()
+        for (m, efc), searches in builds.items():
+            name = f"bench_m{m}_efc{efc}"
+            cfg = hnsw_configuration({"M": m, "ef_construction": efc, "ef_search": searches[0][0]})
+            col = client.create_collection(name=name, embedding_function=None, configuration=cfg)
+            t0 = time.perf_counter()
+            for i in range(0, len(ids), step):
+                col.add(ids=ids[i:i+step], embeddings=vecs[i:i+step])
+            build_s = time.perf_counter() - t0
+
+            for efs, label in searches:
+                col.modify(configuration={"hnsw": {"ef_search": efs}})
+                # a loaded HNSW index keeps its ef_search until it is reloaded
+                client.clear_system_cache()
+                client = chromadb.PersistentClient(path=tmp)
+                col = client.get_collection(name=name, embedding_function=None)
+                col.query(query_embeddings=queries[:1], n_results=k, include=[])   # warm-up / load
+                lat, recall = [], []
+                for qi, q in enumerate(queries):
+                    t0 = time.perf_counter()
+                    res = col.query(query_embeddings=q[None, :], n_results=k, include=[])
+                    lat.append(time.perf_counter() - t0)
+                    recall.append(len(set(res["ids"][0]) & exact_sets[qi]) / k)
+                lat_ms = np.array(lat) * 1000
+                rows.append({"profile": label, "M": m, "ef_construction": efc, "ef_search": efs,
+                             "build_s": round(build_s, 3), f"recall@{k}": round(float(np.mean(recall)), 4),
+                             "p50_ms": round(float(np.percentile(lat_ms, 50)), 3),
+                             "p99_ms": round(float(np.percentile(lat_ms, 99)), 3)})
+                print(rows[-1])
+            client.delete_collection(name)
+
+    df = pd.DataFrame(rows)
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(out.with_suffix(".csv"), index=False)
+    print(f"[OK] {out.with_suffix('.csv')}")
+
+    try:
+        import plotly.express as px
+    except ImportError:
+        print("[WARN] plotly not installed; skipping the plot")
+        return
+    df["config"] = df.apply(lambda r: r["profile"] or f"M={r['M']} efc={r['ef_construction']} efs={r['ef_search']}", axis=1)
+    fig = px.scatter(df, x="p50_ms", y=f"recall@{k}", size="build_s", color="M", symbol="ef_construction",
+                     hover_data=["config", "p99_ms", "build_s"], text="ef_search",
+                     title=f"HNSW recall@{k} vs latency ({len(ids)} vectors; marker size = build time)")
+    fig.write_html(out.with_suffix(".html"))
+    print(f"[OK] {out.with_suffix('.html')}")
+
+if __name__ == "__main__":
+    main()
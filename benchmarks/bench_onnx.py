@@ -0,0 +1,75 @@
+"""
+ONNX Runtime backend vs. the torch SentenceTransformer on our action texts.
+
+Parity: cosine between each action's torch vector and its ONNX (fp32 / int8)
+vector, plus how many of each action's 10 nearest neighbours are unchanged.
+Speed: single-query latency (p50/p99) and batch throughput per backend.
+
+    python benchmarks/bench_onnx.py [--threads 4] [--queries 200]
+"""
+from pathlib import Path
+import argparse
+import json
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np  # noqa: E402
+from config import EMBED_MODEL  # noqa: E402
+from encode_pool import load_encoder  # noqa: E402
+
+def load_action_texts():
+    with open("data/processed/actions.jsonl", "r", encoding="utf-8") as f:
+        return [json.loads(line)["text"] for line in f]
+
+def normalize(x):
+    return x / np.clip(np.linalg.norm(x, axis=1, keepdims=True), 1e-12, None)
+
+def neighbours(x, k):
+    sims = x @ x.T
+    np.fill_diagonal(sims, -np.inf)
+    return np.argsort(-sims, axis=1)[:, :k]
+
+def time_backend(model, texts, n_queries, batch_size=64):
+    lat = []
+    for t in texts[:n_queries]:
+        t0 = time.perf_counter()
+        model.encode([t])
+        lat.append((time.perf_counter() - t0) * 1000)
+    t0 = time.perf_counter()
+    vecs = model.encode(texts, batch_size=batch_size)
+    secs = time.perf_counter() - t0
+    return normalize(np.asarray(vecs, dtype=np.float32)), np.percentile(lat, 50), np.percentile(lat, 99), len(texts) / secs
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", default=EMBED_MODEL)
+    ap.add_argument("--threads", type=int, default=None)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    args = ap.parse_args()
+
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    texts = load_action_texts()
+    k = min(args.k, len(texts) - 1)
+    print(f"{len(texts)} action texts, model={args.model}")
+    print(f"{'backend':<11}{'p50 ms':>9}{'p99 ms':>9}{'docs/s':>10}{'min cos':>10}{'mean cos':>10}{'nn@' + str(k):>8}")
+
+    ref = None
+    ref_nn = None
+    for backend in ("torch", "onnx", "onnx-int8"):
+        model = load_encoder(args.model, backend, threads=args.threads, device="cpu")
+        vecs, p50, p99, tput = time_backend(model, texts, args.queries)
+        if ref is None:
+            ref, ref_nn = vecs, neighbours(vecs, k)
+        cos = np.sum(ref * vecs, axis=1)
+        nn = neighbours(vecs, k)
+        overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_nn, nn)])
+        print(f"{backend:<11}{p50:>9.2f}{p99:>9.2f}{tput:>10.1f}{cos.min():>10.4f}{cos.mean():>10.4f}{overlap:>8.3f}")
+
+if __name__ == "__main__":
+    main()
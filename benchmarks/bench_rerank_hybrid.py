@@ -0,0 +1,78 @@
+"""
+06c_rerank_hybrid: per-strategy sort loop vs. the vectorised rerank(), on synthetic
+candidate tables with many tied scores.
+
+  - reference: the loop with the same tie-break as rerank() (hybrid_score desc,
+    then action_id); outputs are compared as CSV text, so any difference is reported
+  - legacy: the original loop (sort_values with pandas' default, unstable quicksort);
+    only the score sequence can match it, the order inside a tie is arbitrary there
+
+    python benchmarks/bench_rerank_hybrid.py [--strategies 100 1000 10000] [--k 20]
+"""
+from pathlib import Path
+import argparse
+import importlib
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+rerank06c = importlib.import_module("06c_rerank_hybrid")
+
+def loop_rerank(df, tie_break=True):
+    """The pre-vectorisation loop; tie_break=False is the original unstable sort."""
+    out_rows = []
+    for sid in sorted(df["strategy_id"].unique()):
+        sub = df[df["strategy_id"] == sid].copy()
+        sub["hybrid_score"] = rerank06c.SEM_WEIGHT * sub["similarity"] + rerank06c.LEX_WEIGHT * sub["lexical_sim"]
+        if tie_break:
+            sub = sub.sort_values(["hybrid_score", "action_id"], ascending=[False, True], kind="stable")
+        else:
+            sub = sub.sort_values("hybrid_score", ascending=False)
+        sub = sub.reset_index(drop=True)
+        sub["rank_hybrid"] = np.arange(1, len(sub) + 1)
+        out_rows.append(sub)
+    return pd.concat(out_rows, ignore_index=True)
+
+def synthetic(n_strategies, k, seed=0):
+    rng = np.random.default_rng(seed)
+    n = n_strategies * k
+    sid = np.repeat([f"S{i}" for i in range(n_strategies)], k)
+    aid = np.array([f"A{i:08d}" for i in range(n)])
+    df = pd.DataFrame({
+        "strategy_id": sid,
+        "action_id": aid,
+        # 0.05 steps so most scores tie with another candidate of the same strategy
+        "similarity": np.round(rng.uniform(0.3, 0.7, n) / 0.05) * 0.05,
+        "lexical_sim": np.round(rng.uniform(0.0, 0.2, n) / 0.05) * 0.05,
+    })
+    return df.sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--strategies", type=int, nargs="+", default=[100, 1000, 10000])
+    ap.add_argument("--k", type=int, default=20)
+    args = ap.parse_args()
+
+    print(f"{'strategies':>10}{'rows':>10}{'loop s':>10}{'vector s':>10}{'speedup':>9}"
+          f"  identical  legacy scores  legacy order")
+    for s in args.strategies:
+        df = synthetic(s, args.k)
+        t0 = time.perf_counter()
+        a = loop_rerank(df)
+        t_loop = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        b = rerank06c.rerank(df)
+        t_vec = time.perf_counter() - t0
+        legacy = loop_rerank(df, tie_break=False)
+        same = a.to_csv(index=False) == b.to_csv(index=False)
+        legacy_scores = np.array_equal(legacy["hybrid_score"].to_numpy(), b["hybrid_score"].to_numpy())
+        legacy_order = float((legacy["action_id"].to_numpy() == b["action_id"].to_numpy()).mean())
+        print(f"{s:>10}{len(df):>10}{t_loop:>10.3f}{t_vec:>10.3f}{t_loop / t_vec:>9.1f}"
+              f"  {str(same):<9}  {str(legacy_scores):<13}  {legacy_order:.0%} rows")
+
+if __name__ == "__main__":
+    main()
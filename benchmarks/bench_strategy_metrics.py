@@ -0,0 +1,78 @@
+"""
+07_strategy_metrics: per-group loop (the previous implementation) vs. the
+vectorised strategy_metrics(), on synthetic mapping tables of growing size.
+Both outputs are compared as CSV text, so any difference is reported.
+
+    python benchmarks/bench_strategy_metrics.py [--strategies 100 1000 10000] [--k 10]
+"""
+from pathlib import Path
+import argparse
+import importlib
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from config import HIGH_SIM, MED_SIM  # noqa: E402
+
+metrics07 = importlib.import_module("07_strategy_metrics")
+
+def label(sim):
+    if sim >= HIGH_SIM:
+        return "High"
+    if sim >= MED_SIM:
+        return "Medium"
+    return "Low"
+
+def loop_metrics(df):
+    """The pre-vectorisation implementation, kept here as the reference."""
+    df = df.copy()
+    df["label"] = df["similarity"].apply(label)
+    metrics = []
+    for sid, sub in df.groupby("strategy_id"):
+        metrics.append({
+            "strategy_id": sid,
+            "avg_similarity_topk": float(sub["similarity"].mean()),
+            "max_similarity": float(sub["similarity"].max()),
+            "high_count": int((sub["label"] == "High").sum()),
+            "medium_count": int((sub["label"] == "Medium").sum()),
+            "low_count": int((sub["label"] == "Low").sum()),
+            "best_action_id": sub.loc[sub["similarity"].idxmax(), "action_id"],
+            "best_service": sub.loc[sub["similarity"].idxmax(), "service"],
+        })
+    return pd.DataFrame(metrics).sort_values("avg_similarity_topk", ascending=False)
+
+def synthetic(n_strategies, k, seed=0):
+    rng = np.random.default_rng(seed)
+    n = n_strategies * k
+    return pd.DataFrame({
+        "strategy_id": np.repeat([f"S{i}" for i in range(n_strategies)], k),
+        "rank": np.tile(np.arange(1, k + 1), n_strategies),
+        "action_id": [f"A{i:08d}" for i in rng.integers(0, 10 * n, n)],
+        "service": rng.choice(["Roads", "Waste", "Libraries", "Parks", None], n),
+        # 0.01 steps so ties (and ties on the max) are common
+        "similarity": np.round(rng.uniform(0.3, 0.7, n), 2),
+    })
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--strategies", type=int, nargs="+", default=[100, 1000, 10000])
+    ap.add_argument("--k", type=int, default=10)
+    args = ap.parse_args()
+
+    print(f"{'strategies':>10}{'rows':>10}{'loop s':>10}{'vector s':>10}{'speedup':>9}  identical")
+    for s in args.strategies:
+        df = synthetic(s, args.k)
+        t0 = time.perf_counter()
+        a = loop_metrics(df)
+        t_loop = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        b = metrics07.strategy_metrics(df)
+        t_vec = time.perf_counter() - t0
+        same = a.to_csv(index=False) == b.to_csv(index=False)
+        print(f"{s:>10}{len(df):>10}{t_loop:>10.3f}{t_vec:>10.3f}{t_loop / t_vec:>9.1f}  {same}")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
 from pathlib import Path
+import sys
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from gold_labels import load_gold  # noqa: E402
+
 K = 10
 
 def main():
@@ -9,7 +14,7 @@ def main():
         mapping_path = Path("outputs/mapping_topk_explained.csv")
 
     pred = pd.read_csv(mapping_path)
-    gold = pd.read_csv("evaluation/gold_mapping.csv")
+    gold = load_gold()
 
     # Keep only top-K predictions per strategy
     pred = pred[pred["rank"] <= K].copy()
@@ -1,6 +1,11 @@
 from pathlib import Path
+import sys
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from gold_labels import load_gold  # noqa: E402
+
 def eval_for_k(pred_df, gold_df, k):
     pred_k = pred_df[pred_df["rank_hybrid"] <= k].copy() if "rank_hybrid" in pred_df.columns else pred_df[pred_df["rank"] <= k].copy()
 
@@ -13,7 +18,7 @@ def eval_for_k(pred_df, gold_df, k):
     return tp, precision, recall
 
 def main():
-    gold = pd.read_csv("evaluation/gold_mapping.csv")
+    gold = load_gold()
     """
     pred_files = [
         "outputs/mapping_topk_explained.csv",
@@ -25,7 +30,10 @@ def main():
     pred_files = [
         "outputs/mapping_topk_explained.csv",
         "outputs/mapping_topk_goal_filtered_v2.csv",
-        "outputs/mapping_topk_goal_filtered_hybrid.csv"
+        "outputs/mapping_topk_goal_filtered_hybrid.csv",
+        "outputs/mapping_topk_chunked.csv",
+        "outputs/mapping_topk_hybrid_first_stage.csv",
+        "outputs/mapping_topk_cross_encoder.csv"
     ]
 
 
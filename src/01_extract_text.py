@@ -1,25 +1,245 @@
 from pathlib import Path
+import argparse
+import glob
+import hashlib
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pypdf import PdfReader
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
 
-def extract_pdf_to_jsonl(pdf_path: Path, out_jsonl: Path):
-    reader = PdfReader(str(pdf_path))
-    out_jsonl.parent.mkdir(parents=True, exist_ok=True)
+from pdf_backends import BACKENDS, DEFAULT_BACKEND, extract_texts
+
+# Pages handed to one worker at a time. Small enough that a single long
+# delivery program is split across every core, large enough that each worker
+# amortises re-opening the PDF.
+PAGES_PER_SHARD = 16
+
+MANIFEST_NAME = "extract_manifest.json"
+
+# The two plans and the page files 02_make_strategies.py / 03_make_actions.py read by default
+DEFAULT_OUTPUTS = {
+    "strategic_plan.pdf": "strategic_pages.jsonl",
+    "action_plan.pdf": "action_pages.jsonl",
+}
+
+def file_sha256(path: Path):
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+# Page attributes a page can inherit from its ancestors in the page tree
+INHERITED_KEYS = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+def _hash_object(obj, h, seen):
+    """Feed a PDF object graph into h: dicts by sorted key, streams by their raw bytes."""
+    if isinstance(obj, IndirectObject):
+        ref = (obj.idnum, obj.generation)
+        if ref in seen:
+            h.update(b"R%d %d" % ref)
+            return
+        seen.add(ref)
+        obj = obj.get_object()
+    if isinstance(obj, DictionaryObject):
+        h.update(b"<<")
+        for key in sorted(obj):
+            if key in ("/Parent", "/P"):   # back-references up the tree
+                continue
+            h.update(key.encode("utf-8"))
+            _hash_object(obj.raw_get(key), h, seen)
+        h.update(b">>")
+        if isinstance(obj, StreamObject):
+            h.update(obj._data or b"")
+    elif isinstance(obj, ArrayObject):
+        h.update(b"[")
+        for item in obj:
+            _hash_object(item, h, seen)
+        h.update(b"]")
+    else:
+        h.update(repr(obj).encode("utf-8"))
 
+def page_hash(page):
+    """
+    Hash of the whole page object with everything it references: content streams,
+    resolved /Resources (fonts with their ToUnicode maps, Form XObjects, ...) and
+    inherited attributes. Far cheaper than extract_text(), and the extracted text
+    cannot change unless one of these does.
+    """
+    h = hashlib.sha1()
+    seen = set()
+    _hash_object(page, h, seen)
+    for key in INHERITED_KEYS:
+        if key not in page:
+            node = page.get("/Parent")
+            while node is not None and key not in node.get_object():
+                node = node.get_object().get("/Parent")
+            if node is not None:
+                h.update(key.encode("utf-8"))
+                _hash_object(node.get_object().raw_get(key), h, seen)
+    return h.hexdigest()
+
+def load_manifest(path: Path):
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+def save_manifest(manifest, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    tmp.replace(path)
+
+def load_page_texts(out_jsonl: Path):
+    """Previously extracted texts by page_index (empty if the JSONL is missing)."""
+    texts = {}
+    if out_jsonl.exists():
+        with out_jsonl.open("r", encoding="utf-8") as f:
+            for line in f:
+                rec = json.loads(line)
+                texts[rec["page_index"]] = rec["text"]
+    return texts
+
+def extract_pages(pdf_path: str, page_indices, backend=DEFAULT_BACKEND):
+    """Worker: extract the given pages of one PDF. Each worker opens its own document."""
+    return extract_texts(pdf_path, page_indices, backend=backend)
+
+def write_pages_jsonl(doc_name: str, texts, out_jsonl: Path):
+    out_jsonl.parent.mkdir(parents=True, exist_ok=True)
     with out_jsonl.open("w", encoding="utf-8") as f:
-        for i, page in enumerate(reader.pages):
-            text = page.extract_text() or ""
+        for i, text in enumerate(texts):
             rec = {
-                "doc": pdf_path.name,
+                "doc": doc_name,
                 "page_index": i,
                 "text": text
             }
             f.write(json.dumps(rec, ensure_ascii=False) + "\n")
 
-    print(f"[OK] Extracted {len(reader.pages)} pages -> {out_jsonl}")
+def resolve_pdfs(source: str):
+    """A directory (all *.pdf inside it) or a glob pattern -> sorted list of PDF paths."""
+    p = Path(source)
+    if p.is_dir():
+        return sorted(p.glob("*.pdf"))
+    return sorted(Path(x) for x in glob.glob(source) if x.lower().endswith(".pdf"))
+
+def plan_document(pdf_path: Path, out_jsonl: Path, entry, force=False, backend=DEFAULT_BACKEND):
+    """
+    Compare a PDF against its manifest entry.
+    Returns (file_hash, page_hashes, texts, changed_page_indices); page_hashes is
+    None when the whole file is unchanged and can be skipped.
+    Text from a different backend is never reused.
+    """
+    file_hash = file_sha256(pdf_path)
+    if entry and entry.get("backend", DEFAULT_BACKEND) != backend:
+        force = True
+    if not force and entry and entry.get("sha256") == file_hash and out_jsonl.exists():
+        return file_hash, None, None, []
+
+    reader = PdfReader(str(pdf_path))
+    page_hashes = [page_hash(p) for p in reader.pages]
+    texts = [""] * len(page_hashes)
+
+    old_hashes = [] if force or not entry else entry.get("pages", [])
+    old_texts = {} if force else load_page_texts(out_jsonl)
+
+    changed = []
+    for i, h in enumerate(page_hashes):
+        if i < len(old_hashes) and old_hashes[i] == h and i in old_texts:
+            texts[i] = old_texts[i]
+        else:
+            changed.append(i)
+    return file_hash, page_hashes, texts, changed
+
+def extract_many(jobs, workers=None, pages_per_shard=PAGES_PER_SHARD,
+                 manifest_path=None, force=False, backend=DEFAULT_BACKEND):
+    """
+    jobs: list of (pdf_path, out_jsonl).
+    Unchanged files (same sha256 as in the manifest) are skipped; for changed
+    files only pages whose content hash differs are re-extracted. The changed
+    pages of all documents are sharded across one process pool, and each
+    document's JSONL is rewritten as soon as its last shard comes back.
+    """
+    workers = workers or os.cpu_count() or 1
+    manifest_path = manifest_path or Path("data/processed") / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+
+    def finish(pdf_path, doc):
+        write_pages_jsonl(pdf_path.name, doc["texts"], doc["out"])
+        manifest[str(doc["out"])] = {
+            "pdf": str(pdf_path),
+            "sha256": doc["sha256"],
+            "backend": backend,
+            "pages": doc["page_hashes"],
+        }
+        save_manifest(manifest, manifest_path)
+        print(f"[OK] Extracted {doc['n_changed']}/{len(doc['texts'])} changed pages -> {doc['out']}")
+
+    pending = {}
+    shards = []
+    for pdf_path, out_jsonl in jobs:
+        file_hash, page_hashes, texts, changed = plan_document(
+            pdf_path, out_jsonl, manifest.get(str(out_jsonl)), force=force, backend=backend
+        )
+        if page_hashes is None:
+            print(f"[SKIP] {pdf_path.name} unchanged -> {out_jsonl}")
+            continue
+
+        pending[pdf_path] = {"out": out_jsonl, "sha256": file_hash, "page_hashes": page_hashes,
+                             "texts": texts, "n_changed": len(changed), "left": 0}
+        for start in range(0, len(changed), pages_per_shard):
+            shards.append((pdf_path, changed[start:start + pages_per_shard]))
+            pending[pdf_path]["left"] += 1
+
+    # documents where only the file bytes changed (metadata, incremental save) need no extraction
+    for pdf_path in [p for p, d in pending.items() if d["left"] == 0]:
+        finish(pdf_path, pending.pop(pdf_path))
+
+    if not shards:
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as ex:
+        futures = {ex.submit(extract_pages, str(pdf_path), idx, backend): pdf_path for pdf_path, idx in shards}
+
+        for fut in as_completed(futures):
+            pdf_path = futures[fut]
+            doc = pending[pdf_path]
+            for i, text in fut.result():
+                doc["texts"][i] = text
+            doc["left"] -= 1
+
+            if doc["left"] == 0:
+                finish(pdf_path, pending.pop(pdf_path))
+
+def extract_pdf_to_jsonl(pdf_path: Path, out_jsonl: Path, manifest_path=None, force=False,
+                         backend=DEFAULT_BACKEND):
+    extract_many([(pdf_path, out_jsonl)], manifest_path=manifest_path, force=force, backend=backend)
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Extract PDF pages to {doc, page_index, text} JSONL.")
+    ap.add_argument("source", nargs="?", default=None,
+                    help="Directory or glob of PDFs. Omit to extract the two default plans.")
+    ap.add_argument("--out-dir", default="data/processed")
+    ap.add_argument("--workers", type=int, default=None, help="Defaults to every core.")
+    ap.add_argument("--pages-per-shard", type=int, default=PAGES_PER_SHARD)
+    ap.add_argument("--backend", choices=BACKENDS, default=DEFAULT_BACKEND,
+                    help="Text extractor (pypdf is the reference; pypdfium2 is fastest on large tables).")
+    ap.add_argument("--force", action="store_true", help="Ignore the manifest and re-extract every page.")
+    return ap.parse_args()
 
 if __name__ == "__main__":
+    args = parse_args()
     raw_dir = Path("data/raw")
-    proc_dir = Path("data/processed")
-    extract_pdf_to_jsonl(raw_dir / "strategic_plan.pdf", proc_dir / "strategic_pages.jsonl")
-    extract_pdf_to_jsonl(raw_dir / "action_plan.pdf",    proc_dir / "action_pages.jsonl")
\ No newline at end of file
+    proc_dir = Path(args.out_dir)
+
+    if args.source is None:
+        jobs = [(raw_dir / name, proc_dir / out) for name, out in DEFAULT_OUTPUTS.items()]
+    else:
+        pdfs = resolve_pdfs(args.source)
+        if not pdfs:
+            raise FileNotFoundError(f"No PDFs found for {args.source}")
+        # one page JSONL per document; the two plans keep the names 02 and 03 read by default
+        jobs = [(p, proc_dir / DEFAULT_OUTPUTS.get(p.name, f"{p.stem}_pages.jsonl")) for p in pdfs]
+
+    extract_many(jobs, workers=args.workers, pages_per_shard=args.pages_per_shard,
+                 manifest_path=proc_dir / MANIFEST_NAME, force=args.force, backend=args.backend)
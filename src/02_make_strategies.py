@@ -1,52 +1,112 @@
 from pathlib import Path
+import argparse
 import json
 import re
 
 GOAL_RE = re.compile(r"\bGoal\s+(\d+)\b", re.IGNORECASE)
+# A "Goal N" heading split across a page break: "Goal" ends one page, "N" starts a later one
+GOAL_TAIL_RE = re.compile(r"\bGoal\s*\Z", re.IGNORECASE)
+GOAL_HEAD_RE = re.compile(r"\s*(\d+)\b")
 
-def load_pages(path: Path):
-    pages = []
+def iter_pages(path: Path):
     with path.open("r", encoding="utf-8") as f:
         for line in f:
-            pages.append(json.loads(line))
-    return pages
+            yield json.loads(line)
 
-def build_strategies(pages):
-    full_text = "\n".join(p["text"] for p in pages if p["text"])
-    # Find all goal starts
-    matches = list(GOAL_RE.finditer(full_text))
-    strategies = []
+def make_strategy(goal_no, parts, start, end, source_doc):
+    chunk = "".join(parts).strip()
+    # Try to grab first line after "Goal X" as title-ish
+    lines = chunk.splitlines()
+    title = lines[0].strip() if lines else ""
+    return {
+        "strategy_id": f"S{goal_no}",
+        "goal_no": goal_no,
+        "title": title,
+        "text": chunk,
+        "source_doc": source_doc,
+        "start_page": start[0],
+        "start_char": start[1],
+        "end_page": end[0],
+        "end_char": end[1],
+    }
+
+def segment_goals(pages):
+    """
+    Single pass over a page iterator. Yields one strategy per "Goal N" heading
+    as soon as the next heading (or the end of the document) is seen, so only
+    the section currently being read is held in memory.
+
+    Pages are treated as joined with "\\n" (empty pages skipped), exactly like the
+    old full-text join, so a heading split across a page break is still found.
+    start_page/end_page are page_index values; start_char/end_char are offsets
+    into that page's text (end is exclusive).
+    """
+    cur = None          # {"goal_no", "start", "parts"} of the section being read
+    preamble = []       # text before the first heading; only kept for the no-goal fallback
+    pending = None      # {"start", "parts"}: a trailing "Goal" that may continue on the next page
+    source_doc = "strategic_plan.pdf"
+    first_page = None
+    last = None         # (page_index, len(text)) of the last non-empty page
+
+    def sink():
+        return cur["parts"] if cur is not None else preamble
+
+    for p in pages:
+        text = p["text"]
+        if not text:
+            continue
+        page_i = p["page_index"]
+        source_doc = p.get("doc", source_doc)
+        sep = "" if last is None else "\n"
+        if first_page is None:
+            first_page = page_i
+
+        if pending is not None:
+            if not text.strip():
+                pending["parts"].append(sep + text)
+                last = (page_i, len(text))
+                continue
+            hm = GOAL_HEAD_RE.match(text)
+            if hm:
+                if cur is not None:
+                    yield make_strategy(cur["goal_no"], cur["parts"], cur["start"], pending["start"], source_doc)
+                preamble = []
+                cur = {"goal_no": int(hm.group(1)), "start": pending["start"], "parts": pending["parts"]}
+            else:
+                sink().extend(pending["parts"])
+            pending = None
+
+        sink().append(sep)
+        pos = 0
+        for m in GOAL_RE.finditer(text):
+            sink().append(text[pos:m.start()])
+            if cur is not None:
+                yield make_strategy(cur["goal_no"], cur["parts"], cur["start"], (page_i, m.start()), source_doc)
+            preamble = []
+            cur = {"goal_no": int(m.group(1)), "start": (page_i, m.start()), "parts": []}
+            pos = m.start()
 
-    if not matches:
+        tm = GOAL_TAIL_RE.search(text, pos)
+        if tm:
+            sink().append(text[pos:tm.start()])
+            pending = {"start": (page_i, tm.start()), "parts": [text[tm.start():]]}
+        else:
+            sink().append(text[pos:])
+        last = (page_i, len(text))
+
+    if pending is not None:
+        sink().extend(pending["parts"])
+
+    if cur is not None:
+        yield make_strategy(cur["goal_no"], cur["parts"], cur["start"], last, source_doc)
+    else:
         # fallback: entire doc as one strategy
-        strategies.append({
-            "strategy_id": "S1",
-            "goal_no": 1,
-            "title": "Strategic Plan (whole document)",
-            "text": full_text.strip(),
-            "source_doc": "strategic_plan.pdf",
-        })
-        return strategies
-
-    for idx, m in enumerate(matches):
-        goal_no = int(m.group(1))
-        start = m.start()
-        end = matches[idx + 1].start() if idx + 1 < len(matches) else len(full_text)
-        chunk = full_text[start:end].strip()
-
-        # Try to grab first line after "Goal X" as title-ish
-        first_line = chunk.splitlines()[0].strip()
-        title = first_line
-
-        strategies.append({
-            "strategy_id": f"S{goal_no}",
-            "goal_no": goal_no,
-            "title": title,
-            "text": chunk,
-            "source_doc": "strategic_plan.pdf",
-        })
-
-    return strategies
+        s = make_strategy(1, preamble, (first_page, 0), last or (None, 0), source_doc)
+        s["title"] = "Strategic Plan (whole document)"
+        yield s
+
+def build_strategies(pages):
+    return list(segment_goals(pages))
 
 def write_jsonl(records, out_path: Path):
     out_path.parent.mkdir(parents=True, exist_ok=True)
@@ -54,10 +114,23 @@ def write_jsonl(records, out_path: Path):
         for r in records:
             f.write(json.dumps(r, ensure_ascii=False) + "\n")
 
+def parse_args():
+    ap = argparse.ArgumentParser(description="Segment the strategic plan's pages into goal-level strategies.")
+    ap.add_argument("pages", nargs="?", default="data/processed/strategic_pages.jsonl",
+                    help="Page JSONL written by 01_extract_text.py.")
+    return ap.parse_args()
+
 if __name__ == "__main__":
-    pages = load_pages(Path("data/processed/strategic_pages.jsonl"))
-    strategies = build_strategies(pages)
-    write_jsonl(strategies, Path("data/processed/strategies.jsonl"))
-    print(f"[OK] strategies.jsonl created with {len(strategies)} strategies")
-    for s in strategies:
-        print(s["strategy_id"], "-", s["title"][:70])
+    args = parse_args()
+    pages = iter_pages(Path(args.pages))
+    written = []
+
+    def stream():
+        for s in segment_goals(pages):
+            written.append((s["strategy_id"], s["title"]))
+            yield s
+
+    write_jsonl(stream(), Path("data/processed/strategies.jsonl"))
+    print(f"[OK] strategies.jsonl created with {len(written)} strategies")
+    for sid, title in written:
+        print(sid, "-", title[:70])
@@ -1,58 +1,75 @@
 from pathlib import Path
+import argparse
+import csv
+import hashlib
 import json
+import os
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 
 # Example row ending pattern:
 # "... some action text ... 3 3 3 3 1.5 Development Assessment"
 ROW_END_RE = re.compile(r"\s(\d)\s+(\d)?\s*(\d)?\s*(\d)?\s+(\d+\.\d+)\s+(.+)$")
 
-def load_pages(path: Path):
-    pages = []
+# Pages handed to a worker per task when parsing in parallel
+PAGES_PER_TASK = 32
+# Tasks in flight per worker: pages are read ahead only this far
+TASKS_PER_WORKER = 2
+# The service heading is looked for among the first lines of a page
+SERVICE_SCAN_LINES = 25
+
+WS_RE = re.compile(r"\s+")
+NOISE_LINES = {"Supporting Documents", "Finances (000’S)", "Revenue", "Expense", "Net"}
+
+def iter_pages(path: Path):
     with path.open("r", encoding="utf-8") as f:
         for line in f:
-            pages.append(json.loads(line))
-    return pages
+            yield json.loads(line)
+
+def is_service_candidate(ln):
+    """ln is a stripped, non-empty line."""
+    # Skip obvious headers
+    if "Wollongong City Council" in ln or "Delivery Program" in ln:
+        return False
+    if ln.lower().startswith("actions"):
+        return False
+    # Short-ish title case line
+    return 3 <= len(ln) <= 60 and not any(ch.isdigit() for ch in ln)
 
 def guess_service_title(lines):
     """
     Try to identify service heading from page text.
     Usually appears as a standalone title near the top (after page header).
     """
-    candidates = []
-    for ln in lines[:25]:
+    for ln in lines[:SERVICE_SCAN_LINES]:
         ln = ln.strip()
-        if not ln:
-            continue
-        # Skip obvious headers
-        if "Wollongong City Council" in ln or "Delivery Program" in ln:
-            continue
-        if ln.lower().startswith("actions"):
-            continue
-        # Short-ish title case line
-        if 3 <= len(ln) <= 60 and not any(ch.isdigit() for ch in ln):
-            candidates.append(ln)
-
-    return candidates[0] if candidates else None
+        if ln and is_service_candidate(ln):
+            return ln
+    return None
 
 def parse_actions_from_page(page_text, page_index, source_doc):
-    lines = [ln.rstrip() for ln in (page_text or "").splitlines()]
+    """
+    One pass over the page's lines: the service heading is picked up on the way
+    (and filled in afterwards), and ROW_END_RE runs once per line.
+    """
+    lines = (page_text or "").splitlines()
     if not lines:
         return []
 
-    if not any("Actions" in ln for ln in lines[:10] + lines[-10:]) and "Actions" not in page_text:
-        # Still allow pages with action rows even if "Actions" not obvious, but keep it strict:
-        pass
-
-    service = guess_service_title(lines) or "Unknown Service"
-
+    service = None
     actions = []
     buffer = []
 
-    for ln in lines:
+    for n, ln in enumerate(lines):
         ln = ln.strip()
         if not ln:
             continue
 
+        if service is None and n < SERVICE_SCAN_LINES and is_service_candidate(ln):
+            service = ln
+
         # Skip table headers
         if ln.startswith("Actions") or "Operational Plan" in ln or ln.startswith("CSP") or ln.startswith("Delivery"):
             continue
@@ -64,18 +81,17 @@ def parse_actions_from_page(page_text, page_index, source_doc):
             goal_no = int(csp_ref.split(".")[0])
 
             # Everything accumulated + anything before the numbers is action description
-            # Remove the matched tail from ln
-            action_desc_tail_removed = ROW_END_RE.sub("", ln).strip()
+            # (the match runs to end of line, so the tail is everything from m.start())
+            action_desc_tail_removed = ln[:m.start()].strip()
 
             desc_parts = buffer + ([action_desc_tail_removed] if action_desc_tail_removed else [])
-            desc = " ".join(desc_parts).strip()
-            desc = re.sub(r"\s+", " ", desc)
+            desc = WS_RE.sub(" ", " ".join(desc_parts).strip())
 
             if len(desc) >= 15:  # avoid garbage rows
                 actions.append({
                     "goal_no": goal_no,
                     "csp_ref": csp_ref,
-                    "service": service,
+                    "service": None,
                     "delivery_stream": delivery_stream,
                     "text": desc,
                     "source_doc": source_doc,
@@ -86,37 +102,112 @@ def parse_actions_from_page(page_text, page_index, source_doc):
         else:
             # accumulate multi-line action descriptions
             # skip obvious noise lines:
-            if ln in {"Supporting Documents", "Finances (000’S)", "Revenue", "Expense", "Net"}:
+            if ln in NOISE_LINES:
                 continue
             buffer.append(ln)
 
+    service = service or "Unknown Service"
+    for a in actions:
+        a["service"] = service
     return actions
 
+def parse_page(page):
+    return parse_actions_from_page(page["text"], page["page_index"], page["doc"])
+
+def parse_page_chunk(pages):
+    return [a for page in pages for a in parse_page(page)]
+
+def parse_pages(pages, workers=None, pages_per_task=PAGES_PER_TASK):
+    """
+    Parse pages in worker processes, streaming: chunks of pages_per_task pages are
+    submitted as the input is read, with at most TASKS_PER_WORKER chunks per worker
+    in flight, so memory does not grow with the document. Results are yielded in
+    page order, so the merged action list is deterministic.
+    """
+    if workers == 1:
+        for page in pages:
+            yield from parse_page(page)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    pages = iter(pages)
+    inflight = deque()
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        while True:
+            chunk = list(islice(pages, pages_per_task))
+            if chunk:
+                inflight.append(ex.submit(parse_page_chunk, chunk))
+            if inflight and (not chunk or len(inflight) >= workers * TASKS_PER_WORKER):
+                yield from inflight.popleft().result()
+            if not chunk and not inflight:
+                break
+
+def normalize_action_text(text):
+    return WS_RE.sub(" ", text or "").strip().lower()
+
+def stable_action_id(source_doc, csp_ref, text):
+    """Content-addressed ID: the same row gets the same ID however the rows above it change."""
+    key = "\x1f".join([source_doc or "", csp_ref or "", normalize_action_text(text)])
+    return "A" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+def assign_action_ids(actions):
+    """
+    Set a stable action_id on each action and return [(legacy_id, action_id), ...],
+    where legacy_id is the old enumeration-order ID (A00001, ...) for this run.
+    Identical rows in the same document and CSP ref get an occurrence suffix.
+    """
+    seen = {}
+    legacy = []
+    for i, a in enumerate(actions, start=1):
+        aid = stable_action_id(a["source_doc"], a["csp_ref"], a["text"])
+        seen[aid] = seen.get(aid, 0) + 1
+        if seen[aid] > 1:
+            aid = f"{aid}-{seen[aid]}"
+        a["action_id"] = aid
+        legacy.append((f"A{i:05d}", aid))
+    return legacy
+
+def write_legacy_ids(pairs, out_path: Path):
+    """
+    Written once, then left alone: the sequential IDs only mean anything for the
+    enumeration they were labelled against, so a later parse must not remap them.
+    Returns False when the table already exists.
+    """
+    if out_path.exists():
+        return False
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with out_path.open("w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["legacy_action_id", "action_id"])
+        w.writerows(pairs)
+    return True
+
 def write_jsonl(records, out_path: Path):
     out_path.parent.mkdir(parents=True, exist_ok=True)
     with out_path.open("w", encoding="utf-8") as f:
         for r in records:
             f.write(json.dumps(r, ensure_ascii=False) + "\n")
 
-if __name__ == "__main__":
-    pages = load_pages(Path("data/processed/action_pages.jsonl"))
+def parse_args():
+    ap = argparse.ArgumentParser(description="Parse the action plan's table rows into actions.jsonl.")
+    ap.add_argument("pages", nargs="?", default="data/processed/action_pages.jsonl",
+                    help="Page JSONL written by 01_extract_text.py.")
+    return ap.parse_args()
 
-    raw_actions = []
-    for p in pages:
-        raw_actions.extend(
-            parse_actions_from_page(
-                p["text"], p["page_index"], p["doc"]
-            )
-        )
+if __name__ == "__main__":
+    args = parse_args()
+    pages = iter_pages(Path(args.pages))
+    raw_actions = parse_pages(pages)
 
-    # Assign A-IDs
-    actions = []
-    for i, a in enumerate(raw_actions, start=1):
-        a["action_id"] = f"A{i:05d}"
-        actions.append(a)
+    # Assign stable A-IDs (+ lookup from the old sequential ones)
+    actions = list(raw_actions)
+    legacy = assign_action_ids(actions)
 
     out_path = Path("data/processed/actions.jsonl")
     write_jsonl(actions, out_path)
+    legacy_path = Path("data/processed/action_id_legacy.csv")
+    if not write_legacy_ids(legacy, legacy_path):
+        print(f"[INFO] {legacy_path} exists; kept as is")
 
     print(f"[OK] actions.jsonl created with {len(actions)} actions -> {out_path}")
     # Print a few samples
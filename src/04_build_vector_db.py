@@ -1,10 +1,12 @@
 from pathlib import Path
 import json
-from tqdm import tqdm
 import chromadb
-from sentence_transformers import SentenceTransformer
 
-MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+import embeddings
+from config import CHROMA_PATH, ACTIONS_COLLECTION, STRATEGIES_COLLECTION, HNSW_PROFILE
+from embeddings import embed_texts
+from vector_index import (action_metadata, bump_index_version, delta_changed, open_collection,
+                          strategy_metadata, sync_collection)
 
 def load_jsonl(path: Path):
     recs = []
@@ -19,57 +21,39 @@ def main():
 
     print(f"Loaded strategies={len(strategies)}, actions={len(actions)}")
 
-    model = SentenceTransformer(MODEL_NAME)
-
     # Persistent Chroma
-    client = chromadb.PersistentClient(path="db_chroma")
-
-    # Two collections: strategies + actions
-    col_s = client.get_or_create_collection(name="strategies")
-    col_a = client.get_or_create_collection(name="actions")
-
-    # ---- Index strategies
-    s_ids = [s["strategy_id"] for s in strategies]
-    s_docs = [s["text"] for s in strategies]
-    s_metas = [{"goal_no": s["goal_no"], "title": s["title"], "source_doc": s["source_doc"]} for s in strategies]
-    s_emb = model.encode(s_docs, show_progress_bar=True).tolist()
-
-    # Clear old and add fresh (simple approach)
-    try:
-        col_s.delete(ids=s_ids)
-    except Exception:
-        pass
-    col_s.add(ids=s_ids, documents=s_docs, metadatas=s_metas, embeddings=s_emb)
+    client = chromadb.PersistentClient(path=CHROMA_PATH)
+
+    # Two collections: strategies + actions.
+    # We always pass our own embeddings (write_records enforces it), so new collections get
+    # no embedding function; older ones may still carry Chroma's persisted default.
+    # HNSW settings come from config.HNSW_PROFILE.
+    col_s = open_collection(client, STRATEGIES_COLLECTION, HNSW_PROFILE)
+    col_a = open_collection(client, ACTIONS_COLLECTION, HNSW_PROFILE)
+
+    # ---- Index strategies (only the IDs that differ from what is stored)
+    delta_s = sync_collection(
+        col_s,
+        ids=[s["strategy_id"] for s in strategies],
+        docs=[s["text"] for s in strategies],
+        metas=[strategy_metadata(s) for s in strategies],
+        embed_fn=embed_texts,
+    )
 
     # ---- Index actions
-    a_ids = [a["action_id"] for a in actions]
-    a_docs = [a["text"] for a in actions]
-    a_metas = [{
-        "goal_no": a["goal_no"],
-        "csp_ref": a["csp_ref"],
-        "service": a["service"],
-        "delivery_stream": a["delivery_stream"],
-        "page_index": a["page_index"],
-        "source_doc": a["source_doc"]
-    } for a in actions]
-    a_emb = model.encode(a_docs, show_progress_bar=True).tolist()
-
-    # delete may fail on huge list; ignore
-    try:
-        col_a.delete(ids=a_ids)
-    except Exception:
-        pass
-    # Add in batches
-    BATCH = 200
-    for i in tqdm(range(0, len(a_ids), BATCH), desc="Upserting actions"):
-        col_a.add(
-            ids=a_ids[i:i+BATCH],
-            documents=a_docs[i:i+BATCH],
-            metadatas=a_metas[i:i+BATCH],
-            embeddings=a_emb[i:i+BATCH]
-        )
-
-    print("[OK] Chroma DB built at ./db_chroma")
+    delta_a = sync_collection(
+        col_a,
+        ids=[a["action_id"] for a in actions],
+        docs=[a["text"] for a in actions],
+        metas=[action_metadata(a) for a in actions],
+        embed_fn=embed_texts,
+    )
+
+    if delta_changed(delta_s) or delta_changed(delta_a):
+        bump_index_version(CHROMA_PATH)
+
+    print(f"[INFO] Embeddings: {embeddings.stats['cached']} from cache, {embeddings.stats['encoded']} encoded")
+    print(f"[OK] Chroma DB built at ./{CHROMA_PATH}")
     print("Collections:", [c.name for c in client.list_collections()])
 
 if __name__ == "__main__":
@@ -3,6 +3,7 @@ import json
 import chromadb
 
 from config import CHROMA_PATH, ACTIONS_COLLECTION
+from vector_index import action_metadata, bump_index_version, patch_collection
 
 def load_jsonl(path: Path):
     recs = []
@@ -15,35 +16,28 @@ def main():
     actions = load_jsonl(Path("data/processed/actions.jsonl"))
 
     client = chromadb.PersistentClient(path=CHROMA_PATH)
-    col_a = client.get_collection(name=ACTIONS_COLLECTION)
+    # embedding_function=None does not detach a default embedding function persisted with an
+    # older collection; patch_collection writes every document together with its stored vector
+    # (write_records refuses documents without embeddings), so nothing is re-embedded.
+    col_a = client.get_collection(name=ACTIONS_COLLECTION, embedding_function=None)
 
-    # update metadata by re-adding in batches with same ids
     ids = [a["action_id"] for a in actions]
     docs = [a["text"] for a in actions]
-    metas = []
-    for a in actions:
-        metas.append({
-            "action_id": a["action_id"],
-            "goal_no": a.get("goal_no"),
-            "csp_ref": a.get("csp_ref"),
-            "service": a.get("service"),
-            "delivery_stream": a.get("delivery_stream"),
-            "page_index": a.get("page_index"),
-            "source_doc": a.get("source_doc"),
-        })
-
-    # Fetch existing embeddings already stored; easiest safe route is delete+reinsert via embeddings again.
-    # But that costs compute.
-    # We'll instead do an "update" style: Chroma add() with same ids overwrites metadata & docs.
-    B = 200
-    for i in range(0, len(ids), B):
-        col_a.add(
-            ids=ids[i:i+B],
-            documents=docs[i:i+B],
-            metadatas=metas[i:i+B]
-        )
-
-    print("[OK] Updated action metadata to include action_id")
+    metas = [action_metadata(a) for a in actions]
+
+    # Patch metadata + documents in place; stored vectors are passed back unchanged.
+    res = patch_collection(col_a, ids, metas, docs=docs)
+
+    if res["patched"]:
+        bump_index_version(CHROMA_PATH)
+
+    rate = res["patched"] / res["seconds"] if res["seconds"] else float("inf")
+    print(f"[OK] Patched {res['patched']} action records in {res['seconds']:.2f}s ({rate:.0f} records/s)")
+    if res["missing"]:
+        print(f"[WARN] {len(res['missing'])} actions are not in the collection (run 04c to add them)")
+    if not res["vectors_unchanged"]:
+        raise RuntimeError("Stored action vectors changed during a metadata-only patch")
+    print("[OK] Stored vectors verified unchanged")
 
 if __name__ == "__main__":
     main()
@@ -1,12 +1,12 @@
 from pathlib import Path
+import argparse
 import json
 import chromadb
-from sentence_transformers import SentenceTransformer
 
-from config import CHROMA_PATH, ACTIONS_COLLECTION
-
-MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
-BATCH = 200
+import embeddings
+from config import CHROMA_PATH, ACTIONS_COLLECTION, HNSW_PROFILE, HNSW_PROFILES
+from embeddings import embed_texts
+from vector_index import BATCH, action_metadata, bump_index_version, delta_changed, open_collection, sync_collection
 
 def load_jsonl(path: Path):
     out = []
@@ -16,48 +16,37 @@ def load_jsonl(path: Path):
     return out
 
 def main():
+    ap = argparse.ArgumentParser(description="Sync the actions collection with actions.jsonl.")
+    ap.add_argument("--full", action="store_true",
+                    help="Drop and recreate the collection instead of applying only the delta.")
+    ap.add_argument("--profile", choices=sorted(HNSW_PROFILES), default=HNSW_PROFILE,
+                    help="HNSW profile (M / ef_construction only take effect with --full).")
+    args = ap.parse_args()
+
     actions = load_jsonl(Path("data/processed/actions.jsonl"))
     ids = [a["action_id"] for a in actions]
     docs = [a["text"] for a in actions]
-    metas = [{
-        "action_id": a["action_id"],
-        "goal_no": a.get("goal_no"),
-        "csp_ref": a.get("csp_ref"),
-        "service": a.get("service"),
-        "delivery_stream": a.get("delivery_stream"),
-        "page_index": a.get("page_index"),
-        "source_doc": a.get("source_doc"),
-    } for a in actions]
-
-    print("[INFO] Loading embedding model...")
-    model = SentenceTransformer(MODEL_NAME)
+    metas = [action_metadata(a) for a in actions]
 
     print("[INFO] Connecting to Chroma...")
     client = chromadb.PersistentClient(path=CHROMA_PATH)
 
-    # ✅ safest: drop and recreate collection
-    try:
-        client.delete_collection(ACTIONS_COLLECTION)
-        print("[INFO] Deleted old actions collection")
-    except Exception as e:
-        print("[WARN] Could not delete collection (maybe doesn't exist):", e)
-
-    col = client.get_or_create_collection(name=ACTIONS_COLLECTION)
-
-    print("[INFO] Computing embeddings and inserting...")
-    for i in range(0, len(ids), BATCH):
-        batch_docs = docs[i:i+BATCH]
-        batch_emb = model.encode(batch_docs, show_progress_bar=False).tolist()
-
-        col.add(
-            ids=ids[i:i+BATCH],
-            documents=batch_docs,
-            metadatas=metas[i:i+BATCH],
-            embeddings=batch_emb
-        )
-        print(f"[OK] Inserted {min(i+BATCH, len(ids))}/{len(ids)}")
-
-    print("[DONE] Actions collection rebuilt with embeddings + metadata.")
+    if args.full:
+        try:
+            client.delete_collection(ACTIONS_COLLECTION)
+            print("[INFO] Deleted old actions collection")
+        except Exception as e:
+            print("[WARN] Could not delete collection (maybe doesn't exist):", e)
+
+    col = open_collection(client, ACTIONS_COLLECTION, args.profile)
+
+    print("[INFO] Diffing actions.jsonl against the stored collection...")
+    delta = sync_collection(col, ids, docs, metas, embed_fn=embed_texts, batch=BATCH)
+    if args.full or delta_changed(delta):
+        bump_index_version(CHROMA_PATH)
+
+    print(f"[INFO] Embeddings: {embeddings.stats['cached']} from cache, {embeddings.stats['encoded']} encoded")
+    print(f"[DONE] Actions collection in sync ({col.count()} records).")
 
 if __name__ == "__main__":
     main()
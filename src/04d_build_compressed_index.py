@@ -0,0 +1,36 @@
+from pathlib import Path
+import argparse
+import json
+
+from config import PQ_SUBVECTORS
+from embeddings import embed_texts
+from vector_compress import CompressedStore, store_path
+
+def load_jsonl(path: Path):
+    recs = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            recs.append(json.loads(line))
+    return recs
+
+def main():
+    ap = argparse.ArgumentParser(description="Build int8 / PQ compressed action vector stores.")
+    ap.add_argument("--methods", nargs="+", default=["sq8", "pq"], choices=["sq8", "pq"])
+    ap.add_argument("--m", type=int, default=PQ_SUBVECTORS, help="PQ sub-vectors (must divide the dimension)")
+    args = ap.parse_args()
+
+    actions = load_jsonl(Path("data/processed/actions.jsonl"))
+    ids = [a["action_id"] for a in actions]
+    vecs = embed_texts([a["text"] for a in actions])
+    full_bytes = vecs.shape[0] * vecs.shape[1] * 4
+
+    for method in args.methods:
+        store = CompressedStore.build(ids, vecs, method, m=args.m)
+        out = store_path(method)
+        store.save(out)
+        ratio = full_bytes / store.memory_bytes()
+        print(f"[OK] {method}: {store.memory_bytes() / 1024:.1f} KiB resident "
+              f"vs {full_bytes / 1024:.1f} KiB float32 ({ratio:.1f}x) -> {out}")
+
+if __name__ == "__main__":
+    main()
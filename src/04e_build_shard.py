@@ -0,0 +1,56 @@
+from pathlib import Path
+import argparse
+import json
+import chromadb
+
+import embeddings
+from config import ACTIONS_COLLECTION, HNSW_PROFILE, HNSW_PROFILES, SHARDS_PATH
+from embeddings import embed_texts
+from shard_router import register_shard
+from vector_index import action_metadata, bump_index_version, delta_changed, open_collection, sync_collection
+
+def load_jsonl(path: Path):
+    recs = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            recs.append(json.loads(line))
+    return recs
+
+def main():
+    ap = argparse.ArgumentParser(description="Build or re-sync one council/plan shard of the actions index.")
+    ap.add_argument("--council", required=True, help='e.g. "Mid-Coast Council"')
+    ap.add_argument("--plan", required=True, help='e.g. "Delivery Program 2022-2026"')
+    ap.add_argument("--actions", default="data/processed/actions.jsonl")
+    ap.add_argument("--root", default=SHARDS_PATH)
+    ap.add_argument("--profile", choices=sorted(HNSW_PROFILES), default=HNSW_PROFILE)
+    args = ap.parse_args()
+
+    actions = load_jsonl(Path(args.actions))
+    shard = register_shard(args.council, args.plan, root=args.root)
+
+    client = chromadb.PersistentClient(path=shard["path"])
+    col = open_collection(client, ACTIONS_COLLECTION, args.profile)
+
+    metas = []
+    for a in actions:
+        meta = action_metadata(a)
+        meta["council"] = args.council
+        meta["plan"] = args.plan
+        metas.append(meta)
+
+    delta = sync_collection(
+        col,
+        ids=[a["action_id"] for a in actions],
+        docs=[a["text"] for a in actions],
+        metas=metas,
+        embed_fn=embed_texts,
+        name=shard["name"],
+    )
+    if delta_changed(delta):
+        bump_index_version(shard["path"])
+
+    print(f"[INFO] Embeddings: {embeddings.stats['cached']} from cache, {embeddings.stats['encoded']} encoded")
+    print(f"[OK] Shard {shard['name']} at {shard['path']} ({col.count()} actions)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+from pathlib import Path
+import argparse
+import json
+import time
+
+from config import LEXICAL_PATH
+from lexical_index import LexicalIndex
+
+def load_jsonl(path: Path):
+    recs = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            recs.append(json.loads(line))
+    return recs
+
+def main():
+    ap = argparse.ArgumentParser(description="Build / update the sparse lexical index over actions.jsonl.")
+    ap.add_argument("--full", action="store_true", help="Rebuild from scratch instead of updating.")
+    args = ap.parse_args()
+
+    actions = load_jsonl(Path("data/processed/actions.jsonl"))
+    idx = LexicalIndex() if args.full else LexicalIndex.load(LEXICAL_PATH)
+
+    t0 = time.perf_counter()
+    stats = idx.update([a["action_id"] for a in actions], [a["text"] for a in actions])
+    idx.save(LEXICAL_PATH)
+
+    print(f"[INFO] +{stats['added']} added, ~{stats['changed']} changed, -{stats['deleted']} deleted, "
+          f"{stats['unchanged']} unchanged ({time.perf_counter() - t0:.2f}s)")
+    print(f"[OK] Lexical index at ./{LEXICAL_PATH}: {len(idx)} actions x {len(idx.terms)} terms, "
+          f"{idx.tf.nnz} non-zeros")
+
+if __name__ == "__main__":
+    main()
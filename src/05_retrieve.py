@@ -1,23 +1,110 @@
-import chromadb
+from collections import OrderedDict
+import hashlib
+import json
+import time
+
+from config import CHROMA_PATH, SEARCH_BACKEND
+from embeddings import embed_texts, get_model
+from exact_search import open_actions_index
+from vector_index import read_index_version
+
+CACHE_SIZE = 1024
+
+class Retriever:
+    """
+    Long-lived action retriever for the dashboard and batch jobs.
+
+    The actions index (Chroma collection or exact NumPy index, per SEARCH_BACKEND)
+    and the embedding model are opened once and reused. Results are kept in a
+    bounded LRU cache keyed by (query hash, k, where-filter); the whole cache is
+    dropped as soon as the index version written by the 04* scripts changes.
+    """
+
+    def __init__(self, path=CHROMA_PATH, backend=SEARCH_BACKEND, cache_size=CACHE_SIZE):
+        self.path = path
+        self.backend = backend
+        self.col = open_actions_index(backend, path)
+        get_model()  # load the encoder now rather than on the first query
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._version = read_index_version(path)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.query_seconds = 0.0
+        self.hit_seconds = 0.0
+
+    def _check_version(self):
+        version = read_index_version(self.path)
+        if version != self._version:
+            self._cache.clear()
+            self._version = version
+            if self.backend == "exact":
+                self.col = open_actions_index(self.backend, self.path)
+            self.invalidations += 1
+
+    @staticmethod
+    def cache_key(text, k, where):
+        q = hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+        return q, k, json.dumps(where, sort_keys=True) if where else None
+
+    def retrieve(self, strategy_text: str, k: int = 10, where=None):
+        t0 = time.perf_counter()
+        self._check_version()
+        key = self.cache_key(strategy_text, k, where)
+
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            results = self._cache[key]
+            self.hit_seconds += time.perf_counter() - t0
+            return list(results)
+
+        res = self.col.query(
+            query_embeddings=embed_texts([strategy_text]).tolist(),
+            n_results=k,
+            where=where,
+            include=["documents", "metadatas", "distances"]
+        )
+
+        results = []
+        for doc, meta, dist in zip(res["documents"][0], res["metadatas"][0], res["distances"][0]):
+            results.append({
+                "action_text": doc,
+                "meta": meta,
+                "distance": dist
+            })
+
+        self._cache[key] = results
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        self.misses += 1
+        self.query_seconds += time.perf_counter() - t0
+        return list(results)
+
+    def stats(self):
+        calls = self.hits + self.misses
+        return {
+            "calls": calls,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / calls if calls else 0.0,
+            "cached_entries": len(self._cache),
+            "invalidations": self.invalidations,
+            "avg_hit_ms": 1000 * self.hit_seconds / self.hits if self.hits else 0.0,
+            "avg_miss_ms": 1000 * self.query_seconds / self.misses if self.misses else 0.0,
+        }
+
+_retriever = None
+
+def get_retriever():
+    global _retriever
+    if _retriever is None:
+        _retriever = Retriever()
+    return _retriever
 
 def retrieve_actions_for_strategy(strategy_text: str, k: int = 10):
-    client = chromadb.PersistentClient(path="db_chroma")
-    col_a = client.get_collection(name="actions")
-
-    res = col_a.query(
-        query_texts=[strategy_text],
-        n_results=k,
-        include=["documents", "metadatas", "distances"]
-    )
-
-    results = []
-    for doc, meta, dist in zip(res["documents"][0], res["metadatas"][0], res["distances"][0]):
-        results.append({
-            "action_text": doc,
-            "meta": meta,
-            "distance": dist
-        })
-    return results
+    return get_retriever().retrieve(strategy_text, k=k)
 
 if __name__ == "__main__":
     # Example: use a hardcoded strategy query
@@ -0,0 +1,51 @@
+from pathlib import Path
+import argparse
+import json
+
+from config import TOP_K
+from embeddings import embed_texts
+from shard_router import ShardRouter
+
+def load_jsonl(path: Path):
+    recs = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            recs.append(json.loads(line))
+    return recs
+
+def main():
+    ap = argparse.ArgumentParser(description="Which councils have actions like this strategy? (queries every shard)")
+    ap.add_argument("query", nargs="?", default=None, help="Free-text query; defaults to --strategy-id")
+    ap.add_argument("--strategy-id", default="S1", help="Strategy from strategies.jsonl to use as the query")
+    ap.add_argument("--k", type=int, default=TOP_K)
+    ap.add_argument("--goal", type=int, default=None, help="Only actions with this goal_no")
+    args = ap.parse_args()
+
+    if args.query:
+        text = args.query
+    else:
+        strategies = {s["strategy_id"]: s for s in load_jsonl(Path("data/processed/strategies.jsonl"))}
+        text = strategies[args.strategy_id]["text"]
+
+    router = ShardRouter()
+    where = {"goal_no": args.goal} if args.goal is not None else None
+    hits = router.query(embed_texts([text]), k=args.k, where=where)[0]
+
+    for i, h in enumerate(hits, start=1):
+        print(f"#{i} sim={h['similarity']:.3f} {h['council']} / {h['plan']}  {h['id']}  "
+              f"goal_no={h['metadata'].get('goal_no')} service={h['metadata'].get('service')}")
+        print("   ", (h["document"] or "")[:160])
+
+    by_council = {}
+    for h in hits:
+        best, n = by_council.get(h["council"], (0.0, 0))
+        by_council[h["council"]] = (max(best, h["similarity"]), n + 1)
+    print("\nCouncils in the top-k:")
+    for council, (best, n) in sorted(by_council.items(), key=lambda x: -x[1][0]):
+        print(f"  {council:<40} {n:>3} hits, best sim={best:.3f}")
+
+    print(f"\nPer-shard latency ({len(router.shards)} shards):")
+    print(router.latency_report())
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
 from pathlib import Path
 import json
 import pandas as pd
-import chromadb
-from config import CHROMA_PATH, ACTIONS_COLLECTION, TOP_K, dist_to_sim
+from config import TOP_K, dist_to_sim
+from embeddings import embed_texts
+from exact_search import open_actions_index
 
 
 def load_jsonl(path: Path):
@@ -16,27 +17,29 @@ def load_jsonl(path: Path):
 def main():
     strategies = load_jsonl(Path("data/processed/strategies.jsonl"))
 
-    client = chromadb.PersistentClient(path=CHROMA_PATH)
-    col_a = client.get_collection(name=ACTIONS_COLLECTION)
+    # Chroma collection or the exact NumPy index, depending on config.SEARCH_BACKEND
+    col_a = open_actions_index()
 
     rows = []
 
-    for s in strategies:
-        s_id = s["strategy_id"]
-        s_text = s["text"]
+    # All strategies encoded in one batch with the index-time model, one multi-query round-trip
+    s_emb = embed_texts([s["text"] for s in strategies]).tolist()
+
+    # ✅ Chroma doesn't accept "ids" in include (in your version)
+    res = col_a.query(
+        query_embeddings=s_emb,
+        n_results=TOP_K,
+        include=["documents", "metadatas", "distances"]
+    )
 
-        # ✅ Chroma doesn't accept "ids" in include (in your version)
-        res = col_a.query(
-            query_texts=[s_text],
-            n_results=TOP_K,
-            include=["documents", "metadatas", "distances"]
-        )
+    for qi, s in enumerate(strategies):
+        s_id = s["strategy_id"]
 
         # ✅ IDs are returned by default
-        action_ids = res["ids"][0]
-        docs = res["documents"][0]
-        metas = res["metadatas"][0]
-        dists = res["distances"][0]
+        action_ids = res["ids"][qi]
+        docs = res["documents"][qi]
+        metas = res["metadatas"][qi]
+        dists = res["distances"][qi]
 
         for rank, (a_id, doc, meta, dist) in enumerate(
             zip(action_ids, docs, metas, dists), start=1
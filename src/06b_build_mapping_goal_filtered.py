@@ -1,8 +1,9 @@
 from pathlib import Path
 import json
 import pandas as pd
-import chromadb
-from config import CHROMA_PATH, ACTIONS_COLLECTION, TOP_K, dist_to_sim
+from config import TOP_K, dist_to_sim
+from embeddings import embed_texts
+from exact_search import open_actions_index
 
 def load_jsonl(path: Path):
     recs = []
@@ -13,20 +14,32 @@ def load_jsonl(path: Path):
 
 def main():
     strategies = load_jsonl(Path("data/processed/strategies.jsonl"))
-    client = chromadb.PersistentClient(path=CHROMA_PATH)
-    col_a = client.get_collection(name=ACTIONS_COLLECTION)
+    col_a = open_actions_index()
 
-    rows = []
-    for s in strategies:
-        goal_no = s.get("goal_no")
+    # Encode every strategy in one batch, then send one multi-query call per goal
+    # (the where-filter applies to the whole call, so strategies are grouped by goal_no).
+    s_emb = embed_texts([s["text"] for s in strategies]).tolist()
+    by_goal = {}
+    for qi, s in enumerate(strategies):
+        by_goal.setdefault(s.get("goal_no"), []).append(qi)
+
+    results = {}
+    for goal_no, idx in by_goal.items():
         res = col_a.query(
-            query_texts=[s["text"]],
+            query_embeddings=[s_emb[qi] for qi in idx],
             n_results=TOP_K,
-            where={"goal_no": goal_no},  
+            where={"goal_no": goal_no},
             include=["documents", "metadatas", "distances"]
         )
+        for j, qi in enumerate(idx):
+            results[qi] = (res["documents"][j], res["metadatas"][j], res["distances"][j])
+
+    rows = []
+    for qi, s in enumerate(strategies):
+        goal_no = s.get("goal_no")
+        docs, metas, dists = results[qi]
 
-        for rank, (doc, meta, dist) in enumerate(zip(res["documents"][0], res["metadatas"][0], res["distances"][0]), start=1):
+        for rank, (doc, meta, dist) in enumerate(zip(docs, metas, dists), start=1):
             rows.append({
                 "strategy_id": s["strategy_id"],
                 "strategy_goal_no": goal_no,
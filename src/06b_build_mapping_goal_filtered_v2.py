@@ -1,11 +1,11 @@
 from pathlib import Path
 import json
 import pandas as pd
-import chromadb
-from config import CHROMA_PATH, ACTIONS_COLLECTION, dist_to_sim
+from config import dist_to_sim
+from embeddings import embed_texts
+from exact_search import open_actions_index
 
 TOP_K_FINAL = 10
-CANDIDATES = 50  # fetch more candidates before filtering by goal_no
 
 def load_jsonl(path: Path):
     recs = []
@@ -16,23 +16,31 @@ def load_jsonl(path: Path):
 
 def main():
     strategies = load_jsonl(Path("data/processed/strategies.jsonl"))
-    client = chromadb.PersistentClient(path=CHROMA_PATH)
-    col_a = client.get_collection(name=ACTIONS_COLLECTION)
+    col_a = open_actions_index()
 
-    rows = []
-    for s in strategies:
-        s_goal = int(s.get("goal_no"))
+    # All strategies encoded in one batch; one multi-query call per goal, searched
+    # only within that goal's partition, so every strategy gets an exact top-k
+    # (no over-fetching of other goals' actions that are then thrown away).
+    s_emb = embed_texts([s["text"] for s in strategies]).tolist()
+    by_goal = {}
+    for qi, s in enumerate(strategies):
+        by_goal.setdefault(int(s.get("goal_no")), []).append(qi)
 
+    results = {}
+    for s_goal, idx in by_goal.items():
         res = col_a.query(
-            query_texts=[s["text"]],
-            n_results=CANDIDATES,
+            query_embeddings=[s_emb[qi] for qi in idx],
+            n_results=TOP_K_FINAL,
+            where={"goal_no": s_goal},
             include=["documents", "metadatas", "distances"]
         )
+        for j, qi in enumerate(idx):
+            results[qi] = (res["ids"][j], res["documents"][j], res["metadatas"][j], res["distances"][j])
 
-        ids = res["ids"][0]
-        docs = res["documents"][0]
-        metas = res["metadatas"][0]
-        dists = res["distances"][0]
+    rows = []
+    for qi, s in enumerate(strategies):
+        s_goal = int(s.get("goal_no"))
+        ids, docs, metas, dists = results[qi]
 
         cand = []
         for aid, doc, meta, dist in zip(ids, docs, metas, dists):
@@ -55,11 +63,8 @@ def main():
                 "action_text": doc[:600],
             })
 
-        # filter candidates by goal number
-        cand = [x for x in cand if x["action_goal_no"] == s_goal]
-
-        # sort by similarity and keep best 10
-        cand = sorted(cand, key=lambda x: x["similarity"], reverse=True)[:TOP_K_FINAL]
+        # already restricted to the strategy's goal; keep the similarity order explicit
+        cand = sorted(cand, key=lambda x: x["similarity"], reverse=True)
 
         for i, r in enumerate(cand, start=1):
             r["rank"] = i
@@ -2,8 +2,8 @@ from pathlib import Path
 import json
 import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+
+from lexical_index import open_lexical_index
 
 SEM_WEIGHT = 0.5
 LEX_WEIGHT = 0.5
@@ -15,6 +15,28 @@ def load_jsonl(path: Path):
             recs.append(json.loads(line))
     return recs
 
+def rerank(df):
+    """
+    Hybrid score and per-strategy rank for the whole frame in one pass.
+    Rows are ordered by strategy_id, then hybrid_score descending, then action_id,
+    so tied scores (e.g. duplicate action texts) rank the same way on every run;
+    rank_hybrid counts from 1 within each strategy.
+    """
+    df = df.copy()
+    df["hybrid_score"] = SEM_WEIGHT * df["similarity"] + LEX_WEIGHT * df["lexical_sim"]
+
+    codes, _ = pd.factorize(df["strategy_id"], sort=True)
+    action_codes, _ = pd.factorize(df["action_id"].astype(str), sort=True)
+    order = np.lexsort((action_codes, -df["hybrid_score"].to_numpy(), codes))
+    out = df.iloc[order].reset_index(drop=True)
+
+    g = codes[order]
+    n = len(g)
+    starts = np.flatnonzero(np.r_[True, g[1:] != g[:-1]]) if n else np.zeros(0, dtype=np.int64)
+    sizes = np.diff(np.r_[starts, n])
+    out["rank_hybrid"] = np.arange(n) - np.repeat(starts, sizes) + 1
+    return out
+
 def main():
     # mapping_path = Path("outputs/mapping_topk_goal_filtered.csv")
     mapping_path = Path("outputs/mapping_topk_goal_filtered_v2.csv")
@@ -25,33 +47,20 @@ def main():
     df = pd.read_csv(mapping_path)
 
     strategies = load_jsonl(Path("data/processed/strategies.jsonl"))
-    strat_by_id = {s["strategy_id"]: s["text"] for s in strategies}
-
-    out_rows = []
-
-    for sid in sorted(df["strategy_id"].unique()):
-        sub = df[df["strategy_id"] == sid].copy()
-        s_text = strat_by_id.get(sid, "")
-
-        # TF-IDF over [strategy + candidate actions]
-        corpus = [s_text] + sub["action_text"].astype(str).tolist()
-        vec = TfidfVectorizer(stop_words="english", ngram_range=(1,2), max_features=8000)
-        X = vec.fit_transform(corpus)
-
-        s_vec = X[0]
-        a_vecs = X[1:]
-        lex_scores = cosine_similarity(s_vec, a_vecs).flatten()
-
-        sub["lexical_sim"] = lex_scores
-        sub["hybrid_score"] = SEM_WEIGHT * sub["similarity"] + LEX_WEIGHT * sub["lexical_sim"]
-
-        # rerank
-        sub = sub.sort_values("hybrid_score", ascending=False).reset_index(drop=True)
-        sub["rank_hybrid"] = np.arange(1, len(sub) + 1)
+    actions = load_jsonl(Path("data/processed/actions.jsonl"))
 
-        out_rows.append(sub)
+    # TF-IDF with corpus-wide IDF from the persisted index (synced with actions.jsonl);
+    # every (strategy, candidate) pair is scored in one sparse product.
+    # Strategies missing from strategies.jsonl get an empty query (lexical_sim 0).
+    lex = open_lexical_index(actions)
+    s_pos = {s["strategy_id"]: i for i, s in enumerate(strategies)}
+    df["lexical_sim"] = lex.tfidf_pair_scores(
+        [s["text"] for s in strategies] + [""],
+        df["strategy_id"].map(s_pos).fillna(len(strategies)).astype(int).to_numpy(),
+        df["action_id"].astype(str).tolist(),
+    )
 
-    out = pd.concat(out_rows, ignore_index=True)
+    out = rerank(df)
     out.to_csv("outputs/mapping_topk_goal_filtered_hybrid.csv", index=False)
     print("[OK] outputs/mapping_topk_goal_filtered_hybrid.csv written")
 
@@ -0,0 +1,81 @@
+from pathlib import Path
+import argparse
+import json
+import numpy as np
+import pandas as pd
+
+from config import TOP_K, PASSAGE_AGG, PASSAGE_CANDIDATES, dist_to_sim
+from embeddings import embed_texts
+from exact_search import normalize, open_actions_index
+from passages import aggregate, passage_batch
+
+def load_jsonl(path: Path):
+    recs = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            recs.append(json.loads(line))
+    return recs
+
+def main():
+    ap = argparse.ArgumentParser(description="Top-k actions per strategy from passage-level queries.")
+    ap.add_argument("--agg", choices=["max", "mean"], default=PASSAGE_AGG)
+    ap.add_argument("--candidates", type=int, default=PASSAGE_CANDIDATES)
+    args = ap.parse_args()
+
+    strategies = load_jsonl(Path("data/processed/strategies.jsonl"))
+    col_a = open_actions_index()
+
+    # Every passage of every strategy in one encode call and one multi-query call
+    passages, starts = passage_batch([s["text"] for s in strategies])
+    p_emb = normalize(embed_texts(passages))
+    print(f"[INFO] {len(strategies)} strategies -> {len(passages)} passages")
+
+    res = col_a.query(
+        query_embeddings=p_emb.tolist(),
+        n_results=args.candidates,
+        include=["documents", "metadatas", "embeddings"]
+    )
+
+    # Union of all passages' candidates, re-scored exactly against every passage,
+    # so the mean is not biased by actions missing from some passages' lists
+    cand = {}
+    for ids, docs, metas, embs in zip(res["ids"], res["documents"], res["metadatas"], res["embeddings"]):
+        for aid, doc, meta, emb in zip(ids, docs, metas, embs):
+            cand.setdefault(aid, (doc, meta, emb))
+    c_ids = list(cand)
+    c_vecs = normalize(np.array([cand[a][2] for a in c_ids], dtype=np.float32))
+
+    sims = aggregate(p_emb @ c_vecs.T, starts, args.agg)      # (n_strategies, n_candidates)
+    k = min(TOP_K, len(c_ids))
+    top = np.argsort(-sims, axis=1, kind="stable")[:, :k]
+    n_passages = np.diff(np.append(starts, len(passages)))
+
+    rows = []
+    for qi, s in enumerate(strategies):
+        for rank, j in enumerate(top[qi], start=1):
+            doc, meta, _ = cand[c_ids[j]]
+            dist = max(2.0 - 2.0 * float(sims[qi, j]), 0.0)   # squared L2 of unit vectors, as Chroma reports
+            rows.append({
+                "strategy_id": s["strategy_id"],
+                "strategy_goal_no": s.get("goal_no"),
+                "strategy_title": s.get("title", ""),
+                "rank": rank,
+                "action_id": c_ids[j],
+                "action_goal_no": meta.get("goal_no"),
+                "csp_ref": meta.get("csp_ref"),
+                "service": meta.get("service"),
+                "delivery_stream": meta.get("delivery_stream"),
+                "distance": dist,
+                "similarity": float(dist_to_sim(dist)),
+                "n_passages": int(n_passages[qi]),
+                "action_text": (doc[:500] if doc else "")
+            })
+
+    df = pd.DataFrame(rows)
+    Path("outputs").mkdir(exist_ok=True)
+    out_csv = Path("outputs/mapping_topk_chunked.csv")
+    df.to_csv(out_csv, index=False)
+    print(f"[OK] Saved {args.agg}-aggregated mapping to {out_csv} with {len(df)} rows")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+from pathlib import Path
+import argparse
+import json
+import pandas as pd
+
+from config import HYBRID_BUDGET_MS, HYBRID_CANDIDATES, HYBRID_FUSION, dist_to_sim
+from embeddings import embed_texts
+from exact_search import normalize, open_actions_index
+from hybrid_search import HybridRetriever
+from lexical_index import open_lexical_index
+
+TOP_K_FINAL = 10
+
+def load_jsonl(path: Path):
+    recs = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            recs.append(json.loads(line))
+    return recs
+
+def main():
+    ap = argparse.ArgumentParser(description="First-stage hybrid (dense + BM25) mapping of strategies to actions.")
+    ap.add_argument("--fusion", choices=["rrf", "weighted"], default=HYBRID_FUSION)
+    ap.add_argument("--candidates", type=int, default=HYBRID_CANDIDATES)
+    ap.add_argument("--budget-ms", type=float, default=HYBRID_BUDGET_MS,
+                    help="Latency budget per retriever; offline, overruns are only reported.")
+    ap.add_argument("--all-goals", action="store_true",
+                    help="Search the whole corpus instead of only the strategy's own goal.")
+    args = ap.parse_args()
+
+    strategies = load_jsonl(Path("data/processed/strategies.jsonl"))
+    actions = load_jsonl(Path("data/processed/actions.jsonl"))
+    act_by_id = {a["action_id"]: a for a in actions}
+
+    hr = HybridRetriever(
+        open_actions_index(),
+        open_lexical_index(actions),
+        doc_goals={a["action_id"]: a.get("goal_no") for a in actions},
+        fusion=args.fusion,
+        candidates=args.candidates,
+        budget_ms=args.budget_ms,
+        drop_late=False,   # a batch run should never lose a retriever to a slow start
+    )
+    goal_nos = None if args.all_goals else [int(s.get("goal_no")) for s in strategies]
+    s_texts = [s["text"] for s in strategies]
+    s_emb = embed_texts(s_texts)
+    hits = hr.retrieve(s_texts, k=TOP_K_FINAL, goal_nos=goal_nos, query_vectors=s_emb)
+    s_vecs = normalize(s_emb)
+
+    # dense similarity for every fused hit (BM25-only hits have no distance from the index);
+    # the action vectors are already in the embedding cache
+    hit_ids = sorted({h["action_id"] for row in hits for h in row})
+    a_pos = {aid: i for i, aid in enumerate(hit_ids)}
+    a_vecs = normalize(embed_texts([act_by_id[aid]["text"] for aid in hit_ids]))
+
+    rows = []
+    for qi, s in enumerate(strategies):
+        for rank, h in enumerate(hits[qi], start=1):
+            a = act_by_id[h["action_id"]]
+            cos = float(a_vecs[a_pos[h["action_id"]]] @ s_vecs[qi])
+            dist = max(2.0 - 2.0 * cos, 0.0)
+            rows.append({
+                "strategy_id": s["strategy_id"],
+                "strategy_goal_no": int(s.get("goal_no")),
+                "action_id": h["action_id"],
+                "action_goal_no": a.get("goal_no"),
+                "csp_ref": a.get("csp_ref"),
+                "service": a.get("service"),
+                "delivery_stream": a.get("delivery_stream"),
+                "distance": dist,
+                "similarity": float(dist_to_sim(dist)),
+                "action_text": a["text"][:600],
+                "rank": rank,
+                "fused_score": h["fused_score"],
+                "dense_rank": h["dense_rank"],
+                "bm25_rank": h["bm25_rank"],
+            })
+
+    df = pd.DataFrame(rows)
+    for col in ("dense_rank", "bm25_rank"):
+        df[col] = df[col].astype("Int64")
+    Path("outputs").mkdir(exist_ok=True)
+    df.to_csv("outputs/mapping_topk_hybrid_first_stage.csv", index=False)
+
+    t = hr.last_timing
+    fmt = lambda v: "skipped" if v is None else f"{v:.1f} ms"
+    print(f"[INFO] dense {fmt(t['dense_ms'])}, bm25 {fmt(t['bm25_ms'])}, total {t['total_ms']:.1f} ms "
+          f"(budget {args.budget_ms:.0f} ms per retriever)")
+    if t["over_budget"]:
+        print(f"[WARN] Over budget (still fused): {', '.join(t['over_budget'])}")
+    only_bm25 = int((df["dense_rank"].isna()).sum()) if len(df) else 0
+    print(f"[INFO] {only_bm25} of {len(df)} hits were found by BM25 only")
+    print("[OK] outputs/mapping_topk_hybrid_first_stage.csv written", df.shape)
+
+if __name__ == "__main__":
+    main()
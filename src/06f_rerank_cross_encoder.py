@@ -0,0 +1,68 @@
+from pathlib import Path
+import argparse
+import json
+import pandas as pd
+
+from config import RERANK_MODEL, RERANK_TOP_N
+from gold_labels import GOLD_PATH, load_gold_pairs
+from reranker import CrossEncoderReranker
+
+def load_jsonl(path: Path):
+    recs = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            recs.append(json.loads(line))
+    return recs
+
+def precision_at_k(df, rank_col, gold, k=5):
+    top = df[df[rank_col] <= k]
+    pairs = set(zip(top["strategy_id"].astype(str), top["action_id"].astype(str)))
+    return len(pairs & gold) / max(len(pairs), 1)
+
+def main():
+    ap = argparse.ArgumentParser(description="Rerank the top-N candidates per strategy with a cross-encoder.")
+    ap.add_argument("--input", default="outputs/mapping_topk_goal_filtered_hybrid.csv")
+    ap.add_argument("--top-n", type=int, default=RERANK_TOP_N)
+    ap.add_argument("--model", default=RERANK_MODEL)
+    args = ap.parse_args()
+
+    in_path = Path(args.input)
+    if not in_path.exists():
+        raise FileNotFoundError(f"{in_path} not found (run 06c or another mapping script first).")
+    df = pd.read_csv(in_path)
+    prev_rank = "rank_hybrid" if "rank_hybrid" in df.columns else "rank"
+    df = df[df[prev_rank] <= args.top_n].rename(columns={prev_rank: "rank_prev"})
+    if "rank" in df.columns:
+        df = df.drop(columns=["rank"])
+
+    # full texts (the CSV keeps a truncated action_text)
+    s_text = {s["strategy_id"]: s["text"] for s in load_jsonl(Path("data/processed/strategies.jsonl"))}
+    a_text = {a["action_id"]: a["text"] for a in load_jsonl(Path("data/processed/actions.jsonl"))}
+    queries = [s_text.get(sid, "") for sid in df["strategy_id"]]
+    docs = [a_text.get(aid, txt) for aid, txt in zip(df["action_id"], df["action_text"].astype(str))]
+
+    # every pair of every strategy in one call -> full inference batches
+    rr = CrossEncoderReranker(args.model)
+    df["ce_score"] = rr.score_pairs(queries, docs)
+
+    df = df.sort_values(["strategy_id", "ce_score", "rank_prev"], ascending=[True, False, True], kind="stable")
+    df["rank"] = df.groupby("strategy_id").cumcount() + 1
+    df = df.reset_index(drop=True)
+
+    Path("outputs").mkdir(exist_ok=True)
+    df.to_csv("outputs/mapping_topk_cross_encoder.csv", index=False)
+
+    st = rr.stats
+    rate = f"{rr.pairs_per_second():.1f} pairs/s" if st["scored"] else "model not run"
+    print(f"[INFO] {st['pairs']} pairs: {st['cached']} from cache, {st['scored']} scored "
+          f"in {st['model_seconds']:.2f}s ({rate})")
+    gold = load_gold_pairs() if GOLD_PATH.exists() else None
+    if gold is not None:
+        before = precision_at_k(df, "rank_prev", gold)
+        after = precision_at_k(df, "rank", gold)
+        print(f"[INFO] Precision@5 on the gold set: {before:.3f} ({in_path.name}) -> {after:.3f} "
+              f"(cross-encoder), lift {after - before:+.3f}")
+    print("[OK] outputs/mapping_topk_cross_encoder.csv written", df.shape)
+
+if __name__ == "__main__":
+    main()
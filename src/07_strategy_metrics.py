@@ -1,38 +1,65 @@
 from pathlib import Path
+import numpy as np
 import pandas as pd
-import json
 from config import HIGH_SIM, MED_SIM
 
-def label(sim):
-    if sim >= HIGH_SIM:
-        return "High"
-    if sim >= MED_SIM:
-        return "Medium"
-    return "Low"
+LABELS = np.array(["High", "Medium", "Low"])
+
+def label_array(sims):
+    """High / Medium / Low for a whole similarity array (NaN -> Low, as before)."""
+    sims = np.asarray(sims, dtype=float)
+    return np.select([sims >= HIGH_SIM, sims >= MED_SIM], LABELS[:2], LABELS[2])
+
+def group_means(codes, sims, n_groups):
+    """
+    Series.mean() of every group, bit for bit. NaN counts as 0 in the sum and is left
+    out of the count (as pandas does); numpy's pairwise summation order depends on the
+    length, so groups of the same size are summed together as rows of one 2-D array.
+    """
+    order = np.argsort(codes, kind="stable")
+    vals = np.where(np.isnan(sims), 0.0, sims)[order]
+    sizes = np.bincount(codes, minlength=n_groups)
+    counts = np.bincount(codes, weights=~np.isnan(sims), minlength=n_groups)
+    starts = np.r_[0, np.cumsum(sizes)[:-1]]
+    sums = np.zeros(n_groups)
+    for size in np.unique(sizes[sizes > 0]):
+        g = np.flatnonzero(sizes == size)
+        sums[g] = vals[starts[g][:, None] + np.arange(size)].sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
+
+def strategy_metrics(df):
+    """
+    Per-strategy metrics from array operations over the whole table: labels via
+    np.select, counts via bincount, max via reduceat, and best_action_id / best_service
+    from one stable sort (first row with the highest similarity, as idxmax picked).
+    """
+    codes, sids = pd.factorize(df["strategy_id"], sort=True)
+    n_groups = len(sids)
+    sims = df["similarity"].to_numpy(dtype=float)
+    lab = label_array(sims)
+
+    # within a strategy: highest similarity first, earliest row on ties, NaN last
+    order = np.lexsort((np.where(np.isnan(sims), np.inf, -sims), codes))
+    starts = np.flatnonzero(np.r_[True, codes[order][1:] != codes[order][:-1]]) if len(order) else order
+    first = order[starts]
+
+    out = pd.DataFrame({
+        "strategy_id": sids,
+        "avg_similarity_topk": group_means(codes, sims, n_groups),
+        "max_similarity": np.fmax.reduceat(sims[order], starts) if len(order) else np.zeros(0),
+        "high_count": np.bincount(codes, weights=lab == "High", minlength=n_groups).astype(int),
+        "medium_count": np.bincount(codes, weights=lab == "Medium", minlength=n_groups).astype(int),
+        "low_count": np.bincount(codes, weights=lab == "Low", minlength=n_groups).astype(int),
+        "best_action_id": df["action_id"].to_numpy()[first],
+        "best_service": df["service"].to_numpy()[first],
+    })
+    return out.sort_values("avg_similarity_topk", ascending=False)
 
 def main():
     df = pd.read_csv("outputs/mapping_topk.csv")
 
-    df["label"] = df["similarity"].apply(label)
-
-    # per strategy metrics
-    g = df.groupby("strategy_id")
-
-    metrics = []
-    for sid, sub in g:
-        sims = sub["similarity"].tolist()
-        metrics.append({
-            "strategy_id": sid,
-            "avg_similarity_topk": float(sub["similarity"].mean()),
-            "max_similarity": float(sub["similarity"].max()),
-            "high_count": int((sub["label"] == "High").sum()),
-            "medium_count": int((sub["label"] == "Medium").sum()),
-            "low_count": int((sub["label"] == "Low").sum()),
-            "best_action_id": sub.loc[sub["similarity"].idxmax(), "action_id"],
-            "best_service": sub.loc[sub["similarity"].idxmax(), "service"],
-        })
-
-    out = pd.DataFrame(metrics).sort_values("avg_similarity_topk", ascending=False)
+    out = strategy_metrics(df)
     out_path = Path("outputs/strategy_metrics.csv")
     out.to_csv(out_path, index=False)
     print(f"[OK] Wrote {out_path} with {len(out)} strategies")
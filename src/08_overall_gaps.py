@@ -3,6 +3,7 @@ import pandas as pd
 import json
 
 WEAK_THRESHOLD = 0.40   # tune later after you see your scores
+ORPHAN_SAMPLE = 30      # keep gaps.json manageable
 
 def main():
     map_df = pd.read_csv("outputs/mapping_topk.csv")
@@ -14,23 +15,28 @@ def main():
     weak_strategies = weak.to_dict(orient="records")
 
     # Orphan actions = not appearing in any top-k results
+    # (threshold-based orphans over all strategies: 08b_coverage_gaps.py)
     seen_actions = set(map_df["action_id"].dropna().astype(str).tolist())
 
-    # Load all actions
-    all_actions = []
+    # Stream actions: only the orphan sample is kept in memory
+    num_actions = num_orphan = 0
+    orphan_sample = []
     with open("data/processed/actions.jsonl", "r", encoding="utf-8") as f:
         for line in f:
-            all_actions.append(json.loads(line))
-
-    orphan = [a for a in all_actions if a["action_id"] not in seen_actions]
+            a = json.loads(line)
+            num_actions += 1
+            if a["action_id"] not in seen_actions:
+                num_orphan += 1
+                if len(orphan_sample) < ORPHAN_SAMPLE:
+                    orphan_sample.append(a)
 
     overall = {
         "overall_sync_score": overall_score,
         "weak_threshold": WEAK_THRESHOLD,
         "num_strategies": int(strat_df.shape[0]),
-        "num_actions_total": int(len(all_actions)),
+        "num_actions_total": num_actions,
         "num_actions_seen_in_topk": int(len(seen_actions)),
-        "num_orphan_actions": int(len(orphan)),
+        "num_orphan_actions": num_orphan,
     }
 
     Path("outputs").mkdir(exist_ok=True)
@@ -40,7 +46,7 @@ def main():
 
     gaps = {
         "weak_strategies": weak_strategies,
-        "orphan_actions_sample": orphan[:30],   # keep file manageable
+        "orphan_actions_sample": orphan_sample,
     }
     with open("outputs/gaps.json", "w", encoding="utf-8") as f:
         json.dump(gaps, f, indent=2)
@@ -49,7 +55,7 @@ def main():
     print("[OK] outputs/gaps.json written")
     print("Overall sync score:", overall_score)
     print("Weak strategies:", len(weak_strategies))
-    print("Orphan actions:", len(orphan))
+    print("Orphan actions:", num_orphan)
 
 if __name__ == "__main__":
     main()
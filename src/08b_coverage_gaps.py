@@ -0,0 +1,68 @@
+from pathlib import Path
+import argparse
+import json
+import time
+import pandas as pd
+
+from config import COVERAGE_THRESHOLD, COVERAGE_MIN_ACTIONS
+from coverage import open_coverage
+
+def main():
+    ap = argparse.ArgumentParser(description="Orphan actions and weak strategies from the coverage matrix.")
+    ap.add_argument("--threshold", type=float, default=COVERAGE_THRESHOLD)
+    ap.add_argument("--min-actions", type=int, default=COVERAGE_MIN_ACTIONS,
+                    help="A strategy with fewer actions at or above the threshold is weak.")
+    ap.add_argument("--sweep", type=float, nargs="*", default=[],
+                    help="Extra thresholds to summarise (no recomputation).")
+    ap.add_argument("--rebuild", action="store_true", help="Recompute the coverage matrix even if it is current.")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    cov = open_coverage(rebuild=args.rebuild)
+    print(f"[INFO] Coverage: {len(cov.action_ids)} actions x {len(cov.strategy_ids)} strategies, "
+          f"{cov.matrix.nnz} entries >= {cov.min_sim} ({time.perf_counter() - t0:.2f}s)")
+
+    orphans = cov.orphans(args.threshold)
+    weak = cov.weak_strategies(args.threshold, args.min_actions)
+    support = cov.support(max(args.threshold, cov.min_sim))
+
+    Path("outputs").mkdir(exist_ok=True)
+    pd.DataFrame(orphans, columns=["action_id", "best_strategy_id", "best_sim"]).to_csv(
+        "outputs/coverage_orphan_actions.csv", index=False)
+    pd.DataFrame({
+        "strategy_id": cov.strategy_ids,
+        "goal_no": [m.get("goal_no") for m in cov.strategy_meta],
+        "best_sim": cov.strategy_best,
+        "n_actions": support,
+    }).to_csv("outputs/coverage_strategies.csv", index=False)
+
+    sweep = []
+    for t in sorted(set(args.sweep) | {args.threshold}):
+        row = {"threshold": t, "orphan_actions": len(cov.orphans(t))}
+        if t >= cov.min_sim or args.min_actions <= 1:
+            row["weak_strategies"] = len(cov.weak_strategies(t, args.min_actions))
+        sweep.append(row)
+
+    summary = {
+        "threshold": args.threshold,
+        "min_actions": args.min_actions,
+        "min_sim_stored": cov.min_sim,
+        "num_actions_total": len(cov.action_ids),
+        "num_strategies": len(cov.strategy_ids),
+        "num_orphan_actions": len(orphans),
+        "num_weak_strategies": len(weak),
+        "weak_strategies": weak,
+        "sweep": sweep,
+    }
+    with open("outputs/coverage_gaps.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    print("[OK] outputs/coverage_orphan_actions.csv written")
+    print("[OK] outputs/coverage_strategies.csv written")
+    print("[OK] outputs/coverage_gaps.json written")
+    for row in sweep:
+        print(f"  sim >= {row['threshold']:.2f}: {row['orphan_actions']} orphan actions, "
+              f"{row.get('weak_strategies', '-')} weak strategies")
+
+if __name__ == "__main__":
+    main()
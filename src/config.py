@@ -6,6 +6,83 @@ STRATEGIES_COLLECTION = "strategies"
 
 TOP_K = 10
 
+# Sparse lexical index over all actions (lexical_index.py): TF-IDF for 06c, BM25 for hybrid retrieval
+LEXICAL_PATH = "db_lexical"
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# First-stage hybrid retrieval (06e): dense + BM25 candidates fused per strategy
+HYBRID_FUSION = "rrf"         # "rrf" (reciprocal rank fusion) or "weighted"
+RRF_K = 60
+HYBRID_DENSE_WEIGHT = 0.5     # weighted fusion only; BM25 gets 1 - this
+HYBRID_CANDIDATES = 100       # candidates taken from each retriever before fusion
+HYBRID_BUDGET_MS = 2000       # a retriever slower than this is left out of the fusion
+
+# Optional cross-encoder rerank stage (06f) with an sqlite cache of pair scores
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANK_TOP_N = 20             # candidates per strategy sent to the cross-encoder
+RERANK_BATCH = 128            # pairs per inference batch (pairs from all strategies are mixed)
+RERANK_CACHE_PATH = "cache/rerank_scores.sqlite"
+
+# Multi-council layout: one Chroma directory (shard) per council / plan under SHARDS_PATH,
+# queried together by shard_router.ShardRouter. None -> one thread per shard.
+SHARDS_PATH = "db_shards"
+SHARD_WORKERS = None
+
+# HNSW index profiles for the Chroma collections. M (max_neighbors) and ef_construction
+# are fixed when a collection is created (rebuild with 04c --full to change them);
+# ef_search can be changed on an existing collection.
+# "default" matches Chroma's own defaults. See benchmarks/bench_hnsw.py for the trade-off.
+HNSW_PROFILES = {
+    "fast":     {"M": 8,  "ef_construction": 64,  "ef_search": 20},
+    "default":  {"M": 16, "ef_construction": 100, "ef_search": 100},
+    "balanced": {"M": 16, "ef_construction": 200, "ef_search": 64},
+    "accurate": {"M": 32, "ef_construction": 400, "ef_search": 256},
+}
+HNSW_PROFILE = "default"
+
+# Embedding model used at index time and query time (vectors must come from the same model)
+EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# "torch" (SentenceTransformer), "onnx" (onnxruntime, fp32) or "onnx-int8" (dynamically quantized)
+EMBED_BACKEND = "torch"
+ONNX_MODEL_PATH = "cache/onnx"
+# Persistent embedding cache: one memory-mapped float32 matrix + index file per model
+EMBED_CACHE_PATH = "cache/embeddings"
+
+# CPU encoding pool used by embeddings.embed_texts for large batches.
+# None -> cpu_count // ENCODE_THREADS_PER_WORKER workers; 1 disables the pool.
+ENCODE_WORKERS = None
+ENCODE_THREADS_PER_WORKER = 2
+ENCODE_POOL_MIN_TEXTS = 512   # smaller batches are encoded in-process
+
+# Backend for action queries in 05/06*: "chroma" (HNSW) or "exact" (NumPy brute force, see exact_search.py)
+SEARCH_BACKEND = "chroma"
+EXACT_PATH = "db_exact"
+# Exact-index rows are stored sorted by these fields, so an equality filter on one of
+# them scans only that partition. The first field's partitions are always contiguous.
+PARTITION_FIELDS = ("goal_no", "csp_ref", "service")
+
+# Multi-vector strategy queries (06d): strategies are split into overlapping word windows
+# that fit MiniLM's 256-token limit, and passage similarities are reduced per strategy.
+PASSAGE_WORDS = 150
+PASSAGE_OVERLAP = 30
+PASSAGE_AGG = "max"           # "max" or "mean"
+PASSAGE_CANDIDATES = 50       # neighbours fetched per passage before exact re-scoring
+
+# Coverage engine (coverage.py / 08b): every action scored against every strategy, block by block.
+# Only similarities >= COVERAGE_MIN_SIM are stored, so gap lists can be re-cut at any
+# threshold at or above it without recomputing. 0.40 (= MED_SIM, cosine 0.25 under
+# dist_to_sim) is the lowest cut the reports use; a lower floor keeps nearly every pair.
+COVERAGE_PATH = "db_coverage"
+COVERAGE_BLOCK = 1024         # actions per block; the build holds one block x n_strategies scores
+COVERAGE_MIN_SIM = 0.40
+COVERAGE_THRESHOLD = 0.40     # default cut for orphan actions / weak strategies
+COVERAGE_MIN_ACTIONS = 1      # a strategy with fewer supporting actions than this is weak
+
+# Optional compressed copies of the action vectors (see vector_compress.py)
+COMPRESSED_PATH = "db_compressed"
+PQ_SUBVECTORS = 96            # 384-d MiniLM vectors -> 96 bytes per action (16x smaller)
+
 # Distance -> similarity conversion:
 # Chroma returns distances (lower is better). We'll convert to similarity in [0,1].
 # similarity = 1 / (1 + distance)
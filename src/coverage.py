@@ -0,0 +1,240 @@
+# src/coverage.py
+#
+# Coverage engine: how well every action is covered by the strategies, and vice versa.
+# Actions are streamed from actions.jsonl in blocks; each block is embedded (cache hits
+# after 04) and scored against every vector of the strategies collection in one matrix
+# product, the reverse of the per-strategy top-k search in 06*. Each block's kept entries
+# and best scores are appended to spill files under <COVERAGE_PATH>/build as soon as they
+# are computed, so the build holds one block x n_strategies score matrix at a time; the
+# CSR matrix is assembled from the memory-mapped spill files at the end.
+#
+#   <COVERAGE_PATH>/matrix.npz     (n_actions, n_strategies) similarities >= min_sim, scipy CSR
+#   <COVERAGE_PATH>/best.npz       per action / per strategy best similarity and its partner
+#   <COVERAGE_PATH>/coverage.json  action ids, strategy ids, min_sim, index version, actions hash
+#
+# Similarities are dist_to_sim() of the strategies collection's distance, the same scale
+# as the mapping CSVs. Orphan actions and weak strategies can be listed at any threshold
+# without touching the model or the index again: best scores are kept densely, so they are
+# exact at any threshold; support counts come from the sparse matrix and need t >= min_sim.
+
+from pathlib import Path
+import hashlib
+import json
+import shutil
+import numpy as np
+import scipy.sparse as sp
+import chromadb
+
+from config import (CHROMA_PATH, STRATEGIES_COLLECTION, COVERAGE_PATH, COVERAGE_BLOCK, COVERAGE_MIN_SIM,
+                    COVERAGE_MIN_ACTIONS)
+from embeddings import embed_texts
+from exact_search import normalize
+from vector_index import fetch_all, read_index_version
+
+ACTIONS_PATH = "data/processed/actions.jsonl"
+
+# spill file -> dtype, one append per block during Coverage.build
+SPILL = {"row_nnz": np.int64, "indices": np.int32, "data": np.float32,
+         "action_best": np.float32, "action_best_col": np.int64}
+
+def iter_blocks(path, size=COVERAGE_BLOCK):
+    """Records of a .jsonl file, size at a time."""
+    block = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            block.append(json.loads(line))
+            if len(block) == size:
+                yield block
+                block = []
+    if block:
+        yield block
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def strategy_vectors(chroma_path=CHROMA_PATH):
+    """(ids, metadatas, (n, dim) normalised vectors, space) from the strategies collection."""
+    client = chromadb.PersistentClient(path=chroma_path)
+    col = client.get_collection(name=STRATEGIES_COLLECTION, embedding_function=None)
+    stored = fetch_all(col, include=("metadatas", "embeddings"))
+    ids = sorted(stored)
+    vectors = normalize(np.array([stored[i]["embedding"] for i in ids], dtype=np.float32).reshape(len(ids), -1))
+    space = (col.configuration.get("hnsw") or {}).get("space", "l2")
+    return ids, [stored[i]["metadata"] for i in ids], vectors, space
+
+def _read_spill(path, dtype):
+    if path.stat().st_size == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r")
+
+def cos_to_sim(cos, space="l2"):
+    """dist_to_sim() applied to the collection's distance for unit vectors."""
+    dist = np.maximum(2.0 - 2.0 * cos, 0.0) if space == "l2" else 1.0 - cos
+    return 1.0 / (1.0 + dist)
+
+class Coverage:
+    """
+    cov = Coverage.build()                  # or Coverage.load(path) / open_coverage()
+    cov.orphans(0.45)                       # [{"action_id", "best_strategy_id", "best_sim"}, ...]
+    cov.weak_strategies(0.45)               # [{"strategy_id", "goal_no", "best_action_id", "best_sim", "n_actions"}, ...]
+    cov.support(0.45)                       # actions per strategy with similarity >= 0.45
+    cov.supporting_actions("S1", 0.45)      # [(action_id, sim), ...] best first
+    """
+
+    def __init__(self, action_ids, strategy_ids, matrix, action_best, action_best_col,
+                 strategy_best, strategy_best_row, min_sim, strategy_meta=None, source=None):
+        self.action_ids = list(action_ids)
+        self.strategy_ids = list(strategy_ids)
+        self.matrix = matrix.tocsr()
+        self.action_best = action_best
+        self.action_best_col = action_best_col
+        self.strategy_best = strategy_best
+        self.strategy_best_row = strategy_best_row
+        self.min_sim = float(min_sim)
+        self.strategy_meta = strategy_meta if strategy_meta is not None else [{} for _ in self.strategy_ids]
+        self.source = source or {}
+        self._csc = None
+
+    @classmethod
+    def build(cls, actions_path=ACTIONS_PATH, chroma_path=CHROMA_PATH, block=COVERAGE_BLOCK,
+              min_sim=COVERAGE_MIN_SIM, path=COVERAGE_PATH):
+        """Score every action against every strategy, write the store under path and load it."""
+        s_ids, s_meta, s_vecs, space = strategy_vectors(chroma_path)
+        n_s = len(s_ids)
+        if not n_s:
+            raise ValueError(f"No strategies in {chroma_path} (build them with 04_build_vector_db.py)")
+        path = Path(path)
+        spill = path / "build"
+        spill.mkdir(parents=True, exist_ok=True)
+        action_ids = []
+        s_best = np.full(n_s, -np.inf, dtype=np.float32)
+        s_best_row = np.full(n_s, -1, dtype=np.int64)
+
+        files = {name: open(spill / name, "wb") for name in SPILL}
+        try:
+            for recs in iter_blocks(actions_path, block):
+                offset = len(action_ids)
+                action_ids.extend(a["action_id"] for a in recs)
+                sims = cos_to_sim(normalize(embed_texts([a["text"] for a in recs])) @ s_vecs.T, space)
+                sims = sims.astype(np.float32).reshape(len(recs), n_s)
+                best = sims.argmax(axis=1)
+                # running per-strategy best; strict > keeps the first action on ties
+                col_best = sims.argmax(axis=0)
+                col_sim = sims[col_best, np.arange(n_s)]
+                better = col_sim > s_best
+                s_best[better] = col_sim[better]
+                s_best_row[better] = col_best[better] + offset
+                # np.nonzero is row-major, so the spilled entries are already in CSR order
+                r, c = np.nonzero(sims >= min_sim)
+                block_arrays = {"row_nnz": np.bincount(r, minlength=len(recs)), "indices": c, "data": sims[r, c],
+                                "action_best": sims[np.arange(len(recs)), best], "action_best_col": best}
+                for name, arr in block_arrays.items():
+                    files[name].write(np.ascontiguousarray(arr, dtype=SPILL[name]).tobytes())
+        finally:
+            for f in files.values():
+                f.close()
+
+        arrays = {name: _read_spill(spill / name, dtype) for name, dtype in SPILL.items()}
+        indptr = np.concatenate([[0], np.cumsum(arrays["row_nnz"])])
+        matrix = sp.csr_matrix((arrays["data"], arrays["indices"], indptr), shape=(len(action_ids), n_s))
+        source = {"index_version": read_index_version(chroma_path), "actions_sha1": file_sha1(actions_path),
+                  "space": space}
+        cls(action_ids, s_ids, matrix, arrays["action_best"], arrays["action_best_col"],
+            s_best, s_best_row, min_sim, s_meta, source).save(path)
+        del matrix, arrays
+        shutil.rmtree(spill)
+        return cls.load(path)
+
+    # ---- persistence
+
+    def save(self, path=COVERAGE_PATH):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        sp.save_npz(path / "matrix.npz", self.matrix)
+        np.savez(path / "best.npz", action_best=self.action_best, action_best_col=self.action_best_col,
+                 strategy_best=self.strategy_best, strategy_best_row=self.strategy_best_row)
+        rec = {"action_ids": self.action_ids, "strategy_ids": self.strategy_ids,
+               "strategy_meta": self.strategy_meta, "min_sim": self.min_sim, "source": self.source}
+        tmp = path / "coverage.tmp"
+        tmp.write_text(json.dumps(rec, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(path / "coverage.json")
+
+    @classmethod
+    def load(cls, path=COVERAGE_PATH):
+        path = Path(path)
+        rec = json.loads((path / "coverage.json").read_text(encoding="utf-8"))
+        best = np.load(path / "best.npz")
+        return cls(rec["action_ids"], rec["strategy_ids"], sp.load_npz(path / "matrix.npz"),
+                   best["action_best"], best["action_best_col"], best["strategy_best"], best["strategy_best_row"],
+                   rec["min_sim"], rec.get("strategy_meta"), rec.get("source"))
+
+    # ---- queries
+
+    def _check(self, threshold):
+        if threshold < self.min_sim:
+            raise ValueError(f"threshold={threshold} is below the stored min_sim={self.min_sim}; "
+                             f"rebuild with a lower COVERAGE_MIN_SIM")
+
+    def support(self, threshold):
+        """Number of actions with similarity >= threshold, per strategy."""
+        self._check(threshold)
+        m = self.matrix
+        return np.bincount(m.indices[m.data >= threshold], minlength=len(self.strategy_ids))
+
+    def orphans(self, threshold):
+        """Actions whose best strategy scores below threshold, weakest first."""
+        rows = np.flatnonzero(self.action_best < threshold)
+        rows = rows[np.argsort(self.action_best[rows], kind="stable")]
+        return [{
+            "action_id": self.action_ids[r],
+            "best_strategy_id": self.strategy_ids[c] if c >= 0 else None,
+            "best_sim": float(self.action_best[r]),
+        } for r, c in zip(rows.tolist(), self.action_best_col[rows].tolist())]
+
+    def weak_strategies(self, threshold, min_actions=COVERAGE_MIN_ACTIONS):
+        """Strategies with fewer than min_actions actions at or above threshold, weakest first."""
+        if min_actions <= 1 and threshold < self.min_sim:
+            # best scores are dense, so "no action at all" works below min_sim too
+            counts = (self.strategy_best >= threshold).astype(np.int64)
+        else:
+            counts = self.support(threshold)
+        cols = np.flatnonzero(counts < min_actions)
+        cols = cols[np.lexsort((self.strategy_best[cols], counts[cols]))]
+        return [{
+            "strategy_id": self.strategy_ids[c],
+            "goal_no": self.strategy_meta[c].get("goal_no"),
+            "title": self.strategy_meta[c].get("title"),
+            "best_action_id": self.action_ids[r] if r >= 0 else None,
+            "best_sim": float(self.strategy_best[c]),
+            "n_actions": int(counts[c]),
+        } for c, r in zip(cols.tolist(), self.strategy_best_row[cols].tolist())]
+
+    def supporting_actions(self, strategy_id, threshold):
+        self._check(threshold)
+        if self._csc is None:
+            self._csc = self.matrix.tocsc()
+        c = self.strategy_ids.index(strategy_id)
+        lo, hi = self._csc.indptr[c], self._csc.indptr[c + 1]
+        rows, vals = self._csc.indices[lo:hi], self._csc.data[lo:hi]
+        keep = vals >= threshold
+        rows, vals = rows[keep], vals[keep]
+        order = np.lexsort((rows, -vals))
+        return [(self.action_ids[r], float(v)) for r, v in zip(rows[order].tolist(), vals[order].tolist())]
+
+def open_coverage(actions_path=ACTIONS_PATH, chroma_path=CHROMA_PATH, path=COVERAGE_PATH,
+                  min_sim=COVERAGE_MIN_SIM, rebuild=False):
+    """Load the stored coverage, rebuilding it if actions.jsonl, the index or min_sim changed."""
+    if not rebuild and (Path(path) / "coverage.json").exists():
+        cov = Coverage.load(path)
+        src = cov.source
+        if (src.get("index_version") == read_index_version(chroma_path)
+                and src.get("actions_sha1") == file_sha1(actions_path) and cov.min_sim == float(min_sim)):
+            return cov
+    cov = Coverage.build(actions_path, chroma_path, min_sim=min_sim, path=path)
+    print(f"[INFO] Coverage rebuilt: {len(cov.action_ids)} actions x {len(cov.strategy_ids)} strategies, "
+          f"{cov.matrix.nnz} entries >= {cov.min_sim}")
+    return cov
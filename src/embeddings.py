@@ -0,0 +1,167 @@
+# src/embeddings.py
+#
+# Shared sentence embeddings with a persistent on-disk cache.
+# Every script that needs vectors (indexing or querying) goes through embed_texts(),
+# so a text is only ever run through the model once per model name.
+
+from pathlib import Path
+import hashlib
+import json
+import re
+import numpy as np
+
+from config import EMBED_MODEL, EMBED_BACKEND, EMBED_CACHE_PATH, ENCODE_POOL_MIN_TEXTS
+from encode_pool import auto_batch_size, default_workers, get_pool, load_encoder
+from file_lock import file_lock
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    """
+    Vectors for one model keyed by text hash.
+
+    <root>/<model>/vectors.f32  float32 rows, appended, read back via np.memmap
+    <root>/<model>/index.log    one text hash per line; line i is row i of vectors.f32
+    <root>/<model>/meta.json    {"model", "dim"}
+
+    add() appends vectors first and their hashes second, under a lock on
+    <model>/.lock, so several processes can fill the same cache; a hash line is
+    only written once its row is on disk, and rows past the log are overwritten.
+    """
+
+    def __init__(self, model_name: str = EMBED_MODEL, root: str = EMBED_CACHE_PATH):
+        self.model_name = model_name
+        self.dir = Path(root) / re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name)
+        self.vec_path = self.dir / "vectors.f32"
+        self.log_path = self.dir / "index.log"
+        self.meta_path = self.dir / "meta.json"
+        self.lock_path = self.dir / ".lock"
+        self.dim = None
+        self.rows = {}
+        self.n_rows = 0
+        self._log_pos = 0
+        self._mm = None
+        if (self.dir / "index.json").exists() and not self.log_path.exists():
+            self._migrate_index_json()
+        self._refresh()
+
+    def _migrate_index_json(self):
+        """Convert the old single-file index ({"rows": {hash: row}}) to index.log + meta.json."""
+        with file_lock(self.lock_path):
+            if self.log_path.exists():
+                return
+            idx = json.loads((self.dir / "index.json").read_text(encoding="utf-8"))
+            by_row = sorted(idx["rows"].items(), key=lambda kv: kv[1])
+            if [r for _, r in by_row] != list(range(len(by_row))):
+                raise ValueError(f"{self.dir / 'index.json'} does not map hashes to rows 0..n-1")
+            self.meta_path.write_text(json.dumps({"model": self.model_name, "dim": idx["dim"]}), encoding="utf-8")
+            tmp = self.log_path.with_suffix(".tmp")
+            tmp.write_text("".join(h + "\n" for h, _ in by_row), encoding="utf-8")
+            tmp.replace(self.log_path)
+            (self.dir / "index.json").unlink()
+
+    def _refresh(self):
+        """Pick up rows appended to the log (by this or another process) since the last read."""
+        if self.dim is None and self.meta_path.exists():
+            self.dim = json.loads(self.meta_path.read_text(encoding="utf-8"))["dim"]
+        if not self.log_path.exists():
+            return
+        with open(self.log_path, "rb") as f:
+            f.seek(self._log_pos)
+            chunk = f.read()
+        # a line without its newline is an interrupted append: not committed yet
+        end = chunk.rfind(b"\n") + 1
+        for h in chunk[:end].decode("ascii").splitlines():
+            self.rows.setdefault(h, self.n_rows)
+            self.n_rows += 1
+        if end:
+            self._log_pos += end
+            self._mm = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def matrix(self):
+        """Memory-mapped (n, dim) view of every cached vector."""
+        if self._mm is None and self.n_rows:
+            self._mm = np.memmap(self.vec_path, dtype=np.float32, mode="r", shape=(self.n_rows, self.dim))
+        return self._mm
+
+    def get(self, hashes):
+        rows = [self.rows[h] for h in hashes]
+        if not rows:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return np.asarray(self.matrix()[rows], dtype=np.float32)
+
+    def add(self, hashes, vectors):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.lock_path):
+            self._refresh()
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                self.meta_path.write_text(json.dumps({"model": self.model_name, "dim": self.dim}), encoding="utf-8")
+            # another process may have cached some of these while we were encoding
+            keep = [i for i, h in enumerate(hashes) if h not in self.rows]
+            if not keep:
+                return
+            new = [hashes[i] for i in keep]
+            n = self.n_rows
+
+            # drop a torn tail line before appending after it
+            with open(self.log_path, "ab") as f:
+                f.truncate(self._log_pos)
+            # vectors first, log second: rows past the log (from an interrupted write) are overwritten
+            with open(self.vec_path, "ab") as f:
+                f.truncate(n * self.dim * 4)
+                f.seek(n * self.dim * 4)
+                f.write(vectors[keep].tobytes())
+            with open(self.log_path, "ab") as f:
+                f.write("".join(h + "\n" for h in new).encode("ascii"))
+            self._refresh()
+
+_model = None
+_cache = None
+stats = {"cached": 0, "encoded": 0}
+
+def get_model():
+    global _model
+    if _model is None:
+        _model = load_encoder(EMBED_MODEL, EMBED_BACKEND)
+    return _model
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        # ONNX vectors are close to, but not bit-identical with, the torch ones: keep them apart
+        key = EMBED_MODEL if EMBED_BACKEND == "torch" else f"{EMBED_MODEL}@{EMBED_BACKEND}"
+        _cache = EmbeddingCache(key)
+    return _cache
+
+def encode_uncached(texts, show_progress_bar=False):
+    """Run the model. Large batches go to the multi-process pool, small ones stay in-process."""
+    if len(texts) >= ENCODE_POOL_MIN_TEXTS and default_workers() > 1:
+        return get_pool().encode(texts)
+    return get_model().encode(texts, batch_size=auto_batch_size(), show_progress_bar=show_progress_bar)
+
+def embed_texts(texts, show_progress_bar=False):
+    """
+    (n, dim) float32 embeddings for texts, in order. Only texts missing from the
+    cache are encoded; the model is not even loaded when everything is cached.
+    """
+    cache = get_cache()
+    hashes = [text_hash(t) for t in texts]
+
+    missing = {}
+    for h, t in zip(hashes, texts):
+        if h not in cache.rows and h not in missing:
+            missing[h] = t
+
+    if missing:
+        vecs = encode_uncached(list(missing.values()), show_progress_bar=show_progress_bar)
+        cache.add(list(missing.keys()), vecs)
+
+    stats["encoded"] += len(missing)
+    stats["cached"] += len(texts) - len(missing)
+    return cache.get(hashes)
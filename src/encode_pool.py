@@ -0,0 +1,128 @@
+# src/encode_pool.py
+#
+# Multi-process CPU encoding. One SentenceTransformer per worker process, each
+# pinned to a few threads, so a many-core host is used by processes rather than
+# by torch's intra-op threading (which stops scaling after a handful of cores).
+
+import atexit
+import multiprocessing as mp
+import os
+import numpy as np
+
+from config import EMBED_MODEL, EMBED_BACKEND, ENCODE_WORKERS, ENCODE_THREADS_PER_WORKER
+
+# Rough activation memory per sequence for a MiniLM-sized encoder at 256 tokens
+# (attention scores + feed-forward activations, float32), with headroom.
+BYTES_PER_SEQUENCE = 8 * 1024 * 1024
+MIN_BATCH = 8
+MAX_BATCH = 512
+
+def available_memory_bytes():
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return 2 * 1024 ** 3   # sysconf not available (e.g. macOS for AVPHYS): assume 2 GB
+
+def auto_batch_size(workers=1, memory_fraction=0.5):
+    """Largest power-of-two batch whose activations fit in a share of free memory."""
+    budget = available_memory_bytes() * memory_fraction / max(workers, 1)
+    batch = MIN_BATCH
+    while batch * 2 <= MAX_BATCH and batch * 2 * BYTES_PER_SEQUENCE <= budget:
+        batch *= 2
+    return batch
+
+def default_workers(threads_per_worker=ENCODE_THREADS_PER_WORKER):
+    if ENCODE_WORKERS:
+        return ENCODE_WORKERS
+    return max(1, (os.cpu_count() or 1) // threads_per_worker)
+
+def load_encoder(model_name=EMBED_MODEL, backend=EMBED_BACKEND, threads=None, device=None):
+    """An object with SentenceTransformer-style .encode() for the configured backend."""
+    if backend in ("onnx", "onnx-int8"):
+        from onnx_encoder import OnnxEncoder
+        return OnnxEncoder(model_name, quantized=(backend == "onnx-int8"), threads=threads)
+    if backend != "torch":
+        raise ValueError(f"Unsupported EMBED_BACKEND={backend}")
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, device=device)
+
+_worker_model = None
+
+def _init_worker(model_name, threads, backend):
+    # must happen before torch is imported in this process
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    if backend == "torch":
+        import torch
+        torch.set_num_threads(threads)
+
+    global _worker_model
+    _worker_model = load_encoder(model_name, backend, threads=threads, device="cpu")
+
+def _encode_batch(args):
+    texts, batch_size = args
+    return _worker_model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+
+class EncodingPool:
+    """
+    pool = EncodingPool(); vecs = pool.encode(texts)
+
+    Texts are sorted by length so each task holds similarly sized inputs (less
+    padding), sent to the workers one batch per task, and put back in the
+    caller's order.
+    """
+
+    def __init__(self, model_name=EMBED_MODEL, workers=None,
+                 threads_per_worker=ENCODE_THREADS_PER_WORKER, batch_size=None, backend=EMBED_BACKEND):
+        self.workers = workers or default_workers(threads_per_worker)
+        self.batch_size = batch_size or auto_batch_size(self.workers)
+        if backend in ("onnx", "onnx-int8"):
+            # export once here, not in every worker
+            from onnx_encoder import ensure_onnx_model
+            ensure_onnx_model(model_name, quantized=(backend == "onnx-int8"))
+        # spawn: forking a process that already holds torch thread pools is unsafe
+        ctx = mp.get_context("spawn")
+        self._pool = ctx.Pool(self.workers, initializer=_init_worker,
+                              initargs=(model_name, threads_per_worker, backend))
+
+    def encode(self, texts):
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        order = np.argsort([len(t) for t in texts], kind="stable")
+        tasks = []
+        for i in range(0, len(order), self.batch_size):
+            idx = order[i:i + self.batch_size]
+            tasks.append(([texts[j] for j in idx], self.batch_size))
+
+        out = None
+        pos = 0
+        for vecs in self._pool.imap(_encode_batch, tasks):
+            if out is None:
+                out = np.empty((len(texts), vecs.shape[1]), dtype=np.float32)
+            out[order[pos:pos + len(vecs)]] = vecs
+            pos += len(vecs)
+        return out
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+_pool = None
+
+def get_pool():
+    """Process-wide pool, started on first use and shut down at exit."""
+    global _pool
+    if _pool is None:
+        _pool = EncodingPool()
+        atexit.register(_pool.close)
+    return _pool
@@ -0,0 +1,292 @@
+# src/exact_search.py
+#
+# Brute-force search over the action vectors.
+# For a few thousand actions one float32 matrix multiply beats a round-trip through
+# Chroma's HNSW index outright. At tens of thousands it is still exact (HNSW is not)
+# and much faster for metadata-filtered queries, which HNSW handles poorly.
+#
+# The snapshot is exported from the Chroma collection into EXACT_PATH:
+#   <EXACT_PATH>/<collection>/vectors.f32   (n, dim) L2-normalised float32, memory-mapped
+#   <EXACT_PATH>/<collection>/records.json  ids, documents, metadatas, space, index version
+# and is re-exported whenever the index version written by the 04* scripts changes.
+#
+# Rows are sorted by PARTITION_FIELDS (goal_no, then csp_ref, then service), so every
+# goal is one contiguous slice of the matrix. A query filtered on a partition field only
+# multiplies against that partition: cost scales with the partition, not the corpus,
+# and the top-k is exact however small the goal is.
+
+from pathlib import Path
+import json
+import numpy as np
+import chromadb
+
+from config import CHROMA_PATH, ACTIONS_COLLECTION, EXACT_PATH, PARTITION_FIELDS, SEARCH_BACKEND
+from vector_index import fetch_all, read_index_version
+
+INCLUDE = ("documents", "metadatas", "distances")
+
+def normalize(x):
+    x = np.asarray(x, dtype=np.float32)
+    return x / np.clip(np.linalg.norm(x, axis=-1, keepdims=True), 1e-12, None)
+
+def _match(value, cond):
+    """Chroma where-semantics for one metadata value."""
+    if not isinstance(cond, dict):
+        return value == cond
+    (op, arg), = cond.items()
+    if op == "$eq":
+        return value == arg
+    if op == "$ne":
+        return value != arg
+    if op == "$in":
+        return value in arg
+    if op == "$nin":
+        return value not in arg
+    if value is None:
+        return False
+    if op == "$gt":
+        return value > arg
+    if op == "$gte":
+        return value >= arg
+    if op == "$lt":
+        return value < arg
+    if op == "$lte":
+        return value <= arg
+    raise ValueError(f"Unsupported where operator {op}")
+
+def _eq_value(cond):
+    """The value of an equality condition ({"f": v} or {"f": {"$eq": v}}), else None."""
+    if not isinstance(cond, dict):
+        return cond
+    if list(cond) == ["$eq"]:
+        return cond["$eq"]
+    return None
+
+def partition_order(metadatas, fields=PARTITION_FIELDS):
+    """Row order that groups equal values of fields[0], then fields[1], ... together."""
+    def key(i):
+        return tuple((metadatas[i].get(f) is None, str(metadatas[i].get(f))) for f in fields)
+    return sorted(range(len(metadatas)), key=key)
+
+class ExactIndex:
+    """
+    Drop-in for collection.query() on the actions collection:
+
+        idx = ExactIndex.load(path)          # or open_actions_index()
+        res = idx.query(query_embeddings=q, n_results=10, where={"goal_no": 3},
+                        include=["documents", "metadatas", "distances"])
+
+    Returns the same dict of per-query lists as Chroma. Distances follow the
+    collection's space: l2 -> 2 - 2cos (squared L2 of unit vectors), cosine -> 1 - cos,
+    ip -> 1 - dot. An equality on a partition field narrows the scan to that
+    partition; any other where-filter becomes a boolean row mask, computed once
+    per distinct filter and reused.
+    """
+
+    def __init__(self, ids, vectors, documents=None, metadatas=None, space="l2", version=None,
+                 partition_fields=()):
+        self.ids = list(ids)
+        self.vectors = vectors            # (n, dim) normalised float32; a memmap when loaded
+        self.documents = documents if documents is not None else [None] * len(self.ids)
+        self.metadatas = metadatas if metadatas is not None else [{} for _ in self.ids]
+        self.space = space
+        self.version = version
+        self.partition_fields = list(partition_fields)
+        self._masks = {}
+        self._partitions = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def count(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_collection(cls, col, version=None, partition_fields=PARTITION_FIELDS):
+        stored = fetch_all(col, include=("documents", "metadatas", "embeddings"))
+        ids = list(stored)
+        order = partition_order([stored[i]["metadata"] for i in ids], partition_fields)
+        ids = [ids[j] for j in order]
+        vectors = normalize(np.array([stored[i]["embedding"] for i in ids], dtype=np.float32)
+                            .reshape(len(ids), -1))
+        space = (col.configuration.get("hnsw") or {}).get("space", "l2")
+        return cls(ids, vectors,
+                   [stored[i]["document"] for i in ids],
+                   [stored[i]["metadata"] for i in ids],
+                   space=space, version=version, partition_fields=partition_fields)
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        mm = np.memmap(path / "vectors.f32", dtype=np.float32, mode="w+", shape=self.vectors.shape)
+        mm[:] = self.vectors
+        mm.flush()
+        rec = {"ids": self.ids, "dim": int(self.vectors.shape[1]), "space": self.space,
+               "version": self.version, "partition_fields": self.partition_fields,
+               "documents": self.documents, "metadatas": self.metadatas}
+        tmp = path / "records.tmp"
+        tmp.write_text(json.dumps(rec, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(path / "records.json")
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        rec = json.loads((path / "records.json").read_text(encoding="utf-8"))
+        vectors = np.memmap(path / "vectors.f32", dtype=np.float32, mode="r",
+                            shape=(len(rec["ids"]), rec["dim"]))
+        return cls(rec["ids"], vectors, rec["documents"], rec["metadatas"],
+                   space=rec["space"], version=rec["version"],
+                   partition_fields=rec.get("partition_fields", ()))
+
+    def partitions(self, field):
+        """
+        value -> rows for one partition field: a slice when the value's rows are
+        contiguous (always the case for the first field), otherwise an index array.
+        """
+        if field not in self._partitions:
+            groups = {}
+            for i, meta in enumerate(self.metadatas):
+                groups.setdefault(meta.get(field), []).append(i)
+            parts = {}
+            for value, rows in groups.items():
+                if rows[-1] - rows[0] + 1 == len(rows):
+                    parts[value] = slice(rows[0], rows[-1] + 1)
+                else:
+                    parts[value] = np.array(rows)
+            self._partitions[field] = parts
+        return self._partitions[field]
+
+    def plan(self, where):
+        """
+        Split a where filter into (rows, residual): rows narrows the scan to one
+        partition (slice / index array, or None for every row) and residual is
+        what is left to apply as a mask.
+        """
+        if not where:
+            return None, None
+        clauses = where["$and"] if list(where) == ["$and"] else [{f: c} for f, c in where.items()]
+        # the most selective usable partition: prefer contiguous slices, then the smallest
+        best = None
+        for j, clause in enumerate(clauses):
+            (field, cond), = clause.items()
+            value = _eq_value(cond)
+            if field not in self.partition_fields or value is None:
+                continue
+            rows = self.partitions(field).get(value, slice(0, 0))
+            size = rows.stop - rows.start if isinstance(rows, slice) else len(rows)
+            rank = (not isinstance(rows, slice), size)
+            if best is None or rank < best[0]:
+                best = (rank, j, rows)
+        if best is None:
+            return None, where
+        rest = clauses[:best[1]] + clauses[best[1] + 1:]
+        if not rest:
+            return best[2], None
+        return best[2], rest[0] if len(rest) == 1 else {"$and": rest}
+
+    def mask(self, where):
+        """Boolean row mask for a Chroma-style where filter (None -> None, i.e. all rows)."""
+        if not where:
+            return None
+        key = json.dumps(where, sort_keys=True)
+        if key not in self._masks:
+            self._masks[key] = self._eval(where)
+        return self._masks[key]
+
+    def _eval(self, where):
+        m = np.ones(len(self.ids), dtype=bool)
+        for field, cond in where.items():
+            if field == "$and":
+                for sub in cond:
+                    m &= self._eval(sub)
+            elif field == "$or":
+                m &= np.logical_or.reduce([self._eval(sub) for sub in cond])
+            else:
+                m &= np.fromiter((_match(meta.get(field), cond) for meta in self.metadatas),
+                                 dtype=bool, count=len(self.ids))
+        return m
+
+    def search(self, queries, k=10, where=None):
+        """(rows, sims): (n_queries, k') row indices and cosine similarities, best first."""
+        q = normalize(np.atleast_2d(queries))
+        span, residual = self.plan(where)
+        if span is None:
+            sub, offset = self.vectors, None
+        elif isinstance(span, slice):
+            sub, offset = self.vectors[span], span.start   # a view: nothing outside the partition is read
+        else:
+            sub, offset = self.vectors[span], span
+
+        # (n, dim) @ (dim, n_queries) streams the matrix once; transposed to (n_queries, n)
+        scores = np.ascontiguousarray((sub @ q.T).T)
+        m = self.mask(residual)
+        if m is not None and span is not None:
+            m = m[span]
+        n_ok = scores.shape[1] if m is None else int(m.sum())
+        if m is not None:
+            scores[:, ~m] = -np.inf
+        k = min(k, n_ok)
+        if k == 0:
+            return np.zeros((len(q), 0), dtype=np.int64), np.zeros((len(q), 0), dtype=np.float32)
+
+        if k < scores.shape[1]:
+            part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            part = np.tile(np.arange(scores.shape[1]), (len(q), 1))
+        part_scores = np.take_along_axis(scores, part, axis=1)
+        # best first; ties broken by row so results are deterministic
+        order = np.lexsort((part, -part_scores), axis=1)
+        rows = np.take_along_axis(part, order, axis=1)
+        if isinstance(offset, np.ndarray):
+            rows = offset[rows]
+        elif offset:
+            rows = rows + offset
+        return rows, np.take_along_axis(part_scores, order, axis=1)
+
+    def to_distance(self, sims):
+        if self.space == "l2":
+            return np.maximum(2.0 - 2.0 * sims, 0.0)
+        return 1.0 - sims
+
+    def query(self, query_embeddings, n_results=10, where=None, include=INCLUDE):
+        rows, sims = self.search(query_embeddings, k=n_results, where=where)
+        res = {"ids": [[self.ids[r] for r in row] for row in rows],
+               "documents": None, "metadatas": None, "distances": None, "embeddings": None,
+               "included": list(include)}
+        if "documents" in include:
+            res["documents"] = [[self.documents[r] for r in row] for row in rows]
+        if "metadatas" in include:
+            res["metadatas"] = [[self.metadatas[r] for r in row] for row in rows]
+        if "distances" in include:
+            res["distances"] = self.to_distance(sims).tolist()
+        if "embeddings" in include:
+            res["embeddings"] = [np.asarray(self.vectors[row]) for row in rows]
+        return res
+
+def snapshot_path(collection=ACTIONS_COLLECTION, root=EXACT_PATH):
+    return Path(root) / collection
+
+def open_exact_index(collection=ACTIONS_COLLECTION, chroma_path=CHROMA_PATH, root=EXACT_PATH):
+    """Load the snapshot, re-exporting it from Chroma first if the index version moved on."""
+    path = snapshot_path(collection, root)
+    version = read_index_version(chroma_path)
+    if (path / "records.json").exists():
+        idx = ExactIndex.load(path)
+        if version is not None and idx.version == version and idx.partition_fields == list(PARTITION_FIELDS):
+            return idx
+
+    client = chromadb.PersistentClient(path=chroma_path)
+    col = client.get_collection(name=collection, embedding_function=None)
+    idx = ExactIndex.from_collection(col, version=version)
+    idx.save(path)
+    print(f"[INFO] Exported {len(idx)} {collection} vectors to {path}")
+    return ExactIndex.load(path)
+
+def open_actions_index(backend=SEARCH_BACKEND, chroma_path=CHROMA_PATH):
+    """Object with a Chroma-compatible .query(): the collection itself, or the exact index."""
+    if backend == "exact":
+        return open_exact_index(ACTIONS_COLLECTION, chroma_path)
+    if backend == "chroma":
+        client = chromadb.PersistentClient(path=chroma_path)
+        return client.get_collection(name=ACTIONS_COLLECTION, embedding_function=None)
+    raise ValueError(f"Unsupported SEARCH_BACKEND={backend} (choose chroma or exact)")
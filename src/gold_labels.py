@@ -0,0 +1,49 @@
+# src/gold_labels.py
+#
+# The one loader for evaluation/gold_mapping.csv.
+# Gold labels use the stable content-hash action IDs (A + 12 hex). Old-style
+# sequential IDs (A00001, ...) in a label file are translated with
+# data/processed/action_id_legacy.csv, which 03 writes once and never rewrites.
+# Any label that does not resolve to an action in actions.jsonl is an error:
+# a silently unmatched gold pair would just read as a retrieval miss.
+
+from pathlib import Path
+import json
+import re
+import pandas as pd
+
+GOLD_PATH = Path("evaluation/gold_mapping.csv")
+LEGACY_IDS = Path("data/processed/action_id_legacy.csv")
+ACTIONS_PATH = Path("data/processed/actions.jsonl")
+
+LEGACY_ID_RE = re.compile(r"^A\d{5}$")
+
+def known_action_ids(path=ACTIONS_PATH):
+    ids = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            ids.add(json.loads(line)["action_id"])
+    return ids
+
+def load_gold(path=GOLD_PATH, legacy_path=LEGACY_IDS, actions_path=ACTIONS_PATH):
+    """gold_mapping.csv as a DataFrame (strategy_id, action_id) with stable action IDs."""
+    gold = pd.read_csv(path, dtype=str)
+    is_legacy = gold["action_id"].str.match(LEGACY_ID_RE)
+    if is_legacy.any():
+        if not Path(legacy_path).exists():
+            raise FileNotFoundError(f"{path} uses sequential action IDs but {legacy_path} is missing")
+        legacy = pd.read_csv(legacy_path, dtype=str)
+        to_stable = dict(zip(legacy["legacy_action_id"], legacy["action_id"]))
+        gold.loc[is_legacy, "action_id"] = gold.loc[is_legacy, "action_id"].map(to_stable)
+
+    unknown = gold["action_id"].isna() | ~gold["action_id"].isin(known_action_ids(actions_path))
+    if unknown.any():
+        bad = pd.read_csv(path, dtype=str)[unknown]
+        raise ValueError(f"{int(unknown.sum())} gold labels in {path} do not match any action in "
+                         f"{actions_path}:\n{bad.to_string(index=False)}")
+    return gold
+
+def load_gold_pairs(path=GOLD_PATH, **kwargs):
+    """{(strategy_id, action_id), ...}"""
+    gold = load_gold(path, **kwargs)
+    return set(zip(gold["strategy_id"].astype(str), gold["action_id"].astype(str)))
@@ -0,0 +1,167 @@
+# src/hybrid_search.py
+#
+# First-stage hybrid retrieval: dense (embedding index) and sparse (BM25 over the
+# lexical index) candidates are fetched in parallel over the whole corpus and fused,
+# so an action that shares the key terms but embeds poorly can still be retrieved.
+#
+#   rrf:      score = sum over retrievers of 1 / (RRF_K + rank)
+#   weighted: score = w * dense_sim / max + (1 - w) * bm25 / max   (per query)
+#
+# Query vectors are encoded before the fan-out, so the budget covers the index
+# lookups only. Each retriever gets the budget; with drop_late (interactive use) one
+# that misses it is left out of the fusion for that call instead of holding up the
+# batch. Offline scripts pass drop_late=False: both always run, overruns are reported.
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import time
+import numpy as np
+
+from config import (HYBRID_BUDGET_MS, HYBRID_CANDIDATES, HYBRID_DENSE_WEIGHT, HYBRID_FUSION, RRF_K,
+                    dist_to_sim)
+from embeddings import embed_texts
+
+def rrf_fuse(ranked, k=RRF_K):
+    """ranked: {retriever: [id, ...] best first} -> {id: fused score}."""
+    scores = {}
+    for ids in ranked.values():
+        for r, aid in enumerate(ids, start=1):
+            scores[aid] = scores.get(aid, 0.0) + 1.0 / (k + r)
+    return scores
+
+def weighted_fuse(scored, weights):
+    """scored: {retriever: [(id, score), ...]} -> {id: sum of weight * score / max score}."""
+    fused = {}
+    for name, pairs in scored.items():
+        top = max((s for _, s in pairs), default=0.0)
+        if top <= 0:
+            continue
+        for aid, s in pairs:
+            fused[aid] = fused.get(aid, 0.0) + weights[name] * s / top
+    return fused
+
+def top_sparse_rows(m, n, allowed=None):
+    """Per row of a CSR score matrix: [(column, score), ...] of the n best non-zeros."""
+    out = []
+    for i in range(m.shape[0]):
+        cols = m.indices[m.indptr[i]:m.indptr[i + 1]]
+        vals = m.data[m.indptr[i]:m.indptr[i + 1]]
+        if allowed is not None:
+            keep = allowed[i][cols]
+            cols, vals = cols[keep], vals[keep]
+        if len(vals) > n:
+            part = np.argpartition(-vals, n - 1)[:n]
+            cols, vals = cols[part], vals[part]
+        order = np.lexsort((cols, -vals))
+        out.append(list(zip(cols[order].tolist(), vals[order].tolist())))
+    return out
+
+class HybridRetriever:
+    """
+    hr = HybridRetriever(dense_index, lexical_index)      # dense_index: anything with Chroma's .query()
+    hits = hr.retrieve(texts, k=10, goal_nos=[...])        # per text: [{"action_id", "fused_score",
+                                                           #             "dense_rank", "bm25_rank"}, ...]
+    hr.last_timing   # {"encode_ms", "dense_ms", "bm25_ms", "total_ms", "skipped": [...], "over_budget": [...]}
+
+    With goal_nos, each query only sees actions of its own goal (dense: where filter,
+    BM25: column mask built from doc_goals).
+    """
+
+    def __init__(self, dense_index, lexical_index, doc_goals=None, fusion=HYBRID_FUSION,
+                 candidates=HYBRID_CANDIDATES, budget_ms=HYBRID_BUDGET_MS, dense_weight=HYBRID_DENSE_WEIGHT,
+                 drop_late=True):
+        if fusion not in ("rrf", "weighted"):
+            raise ValueError(f"Unsupported fusion={fusion} (choose rrf or weighted)")
+        self.dense = dense_index
+        self.lex = lexical_index
+        self.fusion = fusion
+        self.candidates = candidates
+        self.budget_ms = budget_ms
+        self.dense_weight = dense_weight
+        self.drop_late = drop_late
+        self.doc_goals = None
+        if doc_goals is not None:
+            self.doc_goals = np.array([doc_goals.get(rid) for rid in self.lex.ids], dtype=object)
+        self.last_timing = {}
+
+    def _dense(self, query_vectors, goal_nos):
+        t0 = time.perf_counter()
+        emb = np.asarray(query_vectors, dtype=np.float32).tolist()
+        groups = {None: list(range(len(emb)))} if goal_nos is None else {}
+        if goal_nos is not None:
+            for qi, g in enumerate(goal_nos):
+                groups.setdefault(g, []).append(qi)
+
+        out = [None] * len(emb)
+        for g, idx in groups.items():
+            res = self.dense.query(
+                query_embeddings=[emb[qi] for qi in idx],
+                n_results=self.candidates,
+                where=None if g is None else {"goal_no": g},
+                include=["distances"]
+            )
+            for j, qi in enumerate(idx):
+                out[qi] = [(aid, dist_to_sim(d)) for aid, d in zip(res["ids"][j], res["distances"][j])]
+        return out, time.perf_counter() - t0
+
+    def _bm25(self, texts, goal_nos):
+        t0 = time.perf_counter()
+        scores = self.lex.bm25_scores(texts)
+        allowed = None
+        if goal_nos is not None and self.doc_goals is not None:
+            allowed = [self.doc_goals == g for g in goal_nos]
+        rows = top_sparse_rows(scores, self.candidates, allowed)
+        out = [[(self.lex.ids[c], s) for c, s in row] for row in rows]
+        return out, time.perf_counter() - t0
+
+    def retrieve(self, texts, k=10, goal_nos=None, query_vectors=None):
+        """query_vectors: embeddings of texts if the caller already has them."""
+        t0 = time.perf_counter()
+        if query_vectors is None:
+            query_vectors = embed_texts(texts)
+        encode_ms = 1000 * (time.perf_counter() - t0)
+
+        ex = ThreadPoolExecutor(max_workers=2)
+        futs = {ex.submit(self._dense, query_vectors, goal_nos): "dense",
+                ex.submit(self._bm25, texts, goal_nos): "bm25"}
+        if self.drop_late:
+            done, _ = wait(futs, timeout=self.budget_ms / 1000)
+            if not done:
+                # nothing within budget: take whichever retriever finishes first
+                done, _ = wait(futs, return_when=FIRST_COMPLETED)
+            ex.shutdown(wait=False, cancel_futures=True)
+        else:
+            done, _ = wait(futs)
+            ex.shutdown()
+
+        results, timing = {}, {"encode_ms": encode_ms, "skipped": [], "over_budget": []}
+        for fut, name in futs.items():
+            if fut in done:
+                results[name], sec = fut.result()
+                timing[f"{name}_ms"] = 1000 * sec
+                if 1000 * sec > self.budget_ms:
+                    timing["over_budget"].append(name)
+            else:
+                timing["skipped"].append(name)
+                timing["over_budget"].append(name)
+                timing[f"{name}_ms"] = None
+
+        hits = []
+        for qi in range(len(texts)):
+            lists = {name: res[qi] for name, res in results.items()}
+            if self.fusion == "rrf":
+                fused = rrf_fuse({name: [aid for aid, _ in pairs] for name, pairs in lists.items()})
+            else:
+                weights = {"dense": self.dense_weight, "bm25": 1.0 - self.dense_weight}
+                fused = weighted_fuse(lists, weights)
+            ranks = {name: {aid: r for r, (aid, _) in enumerate(pairs, start=1)} for name, pairs in lists.items()}
+            best = sorted(fused.items(), key=lambda x: (-x[1], x[0]))[:k]
+            hits.append([{
+                "action_id": aid,
+                "fused_score": score,
+                "dense_rank": ranks.get("dense", {}).get(aid),
+                "bm25_rank": ranks.get("bm25", {}).get(aid),
+            } for aid, score in best])
+
+        timing["total_ms"] = 1000 * (time.perf_counter() - t0)
+        self.last_timing = timing
+        return hits
@@ -0,0 +1,198 @@
+# src/lexical_index.py
+#
+# Sparse lexical index over all actions, built once and updated incrementally.
+#
+#   <LEXICAL_PATH>/tf.npz       (n_docs, n_terms) raw term counts, scipy CSR
+#   <LEXICAL_PATH>/df.npy       document frequency per term
+#   <LEXICAL_PATH>/vocab.json   terms in column order
+#   <LEXICAL_PATH>/docs.json    action ids in row order + text hashes (to detect changes)
+#
+# Tokenisation is sklearn's TfidfVectorizer analyzer (English stop words, 1-2 grams),
+# the same analysis 06c used per strategy, but IDF now comes from the whole corpus.
+# Scores for many (query, document) pairs come from one sparse product.
+
+from pathlib import Path
+import hashlib
+import json
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from config import LEXICAL_PATH, BM25_K1, BM25_B
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+def _l2_rows(m):
+    norms = np.sqrt(np.asarray(m.multiply(m).sum(axis=1)).ravel())
+    return sp.diags(1.0 / np.maximum(norms, 1e-12)) @ m
+
+class LexicalIndex:
+    """
+    idx = LexicalIndex.load(path)                 # or LexicalIndex() for an empty index
+    idx.update(ids, texts)                        # adds / re-tokenises / drops only what changed
+    idx.save(path)
+    idx.tfidf_pair_scores(query_texts, q_idx, doc_ids)   # cosine per (query, doc) pair
+    idx.bm25_scores(query_texts)                  # (n_queries, n_docs) BM25
+    """
+
+    def __init__(self):
+        self.analyzer = TfidfVectorizer(stop_words="english", ngram_range=(1, 2)).build_analyzer()
+        self.terms = []
+        self.vocab = {}
+        self.ids = []
+        self.hashes = []
+        self.row = {}
+        self.tf = sp.csr_matrix((0, 0), dtype=np.float32)
+        self.df = np.zeros(0, dtype=np.int64)
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    # ---- build / update
+
+    def _count_rows(self, texts, grow=True):
+        """CSR term counts for texts; new terms are added to the vocabulary when grow=True."""
+        indptr, indices, data = [0], [], []
+        for text in texts:
+            counts = {}
+            for tok in self.analyzer(text or ""):
+                col = self.vocab.get(tok)
+                if col is None:
+                    if not grow:
+                        continue
+                    col = self.vocab[tok] = len(self.terms)
+                    self.terms.append(tok)
+                counts[col] = counts.get(col, 0) + 1
+            indices.extend(counts)
+            data.extend(counts.values())
+            indptr.append(len(indices))
+        m = sp.csr_matrix((np.array(data, dtype=np.float32), np.array(indices, dtype=np.int64), indptr),
+                          shape=(len(texts), len(self.terms)))
+        m.sort_indices()
+        return m
+
+    def update(self, ids, texts):
+        """
+        Bring the index in line with (ids, texts). Unchanged documents keep their rows;
+        only new or edited texts are tokenised. Returns {"added", "changed", "deleted", "unchanged"}.
+        """
+        wanted = {rid: (t, text_hash(t)) for rid, t in zip(ids, texts)}
+        keep = []
+        for r, rid in enumerate(self.ids):
+            if rid in wanted and wanted[rid][1] == self.hashes[r]:
+                keep.append(r)
+        kept_ids = {self.ids[r] for r in keep}
+        redo = [rid for rid in wanted if rid not in kept_ids]
+        stats = {"added": sum(rid not in self.row for rid in redo),
+                 "changed": sum(rid in self.row for rid in redo),
+                 "deleted": sum(rid not in wanted for rid in self.ids),
+                 "unchanged": len(keep)}
+
+        if redo or stats["deleted"]:
+            new_tf = self._count_rows([wanted[rid][0] for rid in redo])
+            old_tf = self.tf[keep]
+            old_tf.resize((len(keep), len(self.terms)))
+            self.tf = sp.vstack([old_tf, new_tf], format="csr")
+            self.ids = [self.ids[r] for r in keep] + redo
+            self.hashes = [self.hashes[r] for r in keep] + [wanted[rid][1] for rid in redo]
+            self.row = {rid: r for r, rid in enumerate(self.ids)}
+            self.df = np.bincount(self.tf.indices, minlength=len(self.terms)).astype(np.int64)
+            # drop terms only deleted / edited documents used, so queries ignore them as a fresh build would
+            live = self.df > 0
+            if not live.all():
+                self.tf = self.tf[:, live]
+                self.df = self.df[live]
+                self.terms = [t for t, keep_term in zip(self.terms, live) if keep_term]
+                self.vocab = {t: i for i, t in enumerate(self.terms)}
+            self._cache = {}
+        return stats
+
+    # ---- persistence
+
+    def save(self, path=LEXICAL_PATH):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        sp.save_npz(path / "tf.npz", self.tf)
+        np.save(path / "df.npy", self.df)
+        (path / "vocab.json").write_text(json.dumps(self.terms, ensure_ascii=False), encoding="utf-8")
+        (path / "docs.json").write_text(json.dumps({"ids": self.ids, "hashes": self.hashes}), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path=LEXICAL_PATH):
+        path = Path(path)
+        idx = cls()
+        if not (path / "docs.json").exists():
+            return idx
+        idx.terms = json.loads((path / "vocab.json").read_text(encoding="utf-8"))
+        idx.vocab = {t: i for i, t in enumerate(idx.terms)}
+        docs = json.loads((path / "docs.json").read_text(encoding="utf-8"))
+        idx.ids, idx.hashes = docs["ids"], docs["hashes"]
+        idx.row = {rid: r for r, rid in enumerate(idx.ids)}
+        idx.tf = sp.load_npz(path / "tf.npz").tocsr()
+        idx.df = np.load(path / "df.npy")
+        return idx
+
+    # ---- scoring
+
+    def idf(self):
+        """Smoothed IDF as in sklearn: ln((1 + n) / (1 + df)) + 1."""
+        return np.log((1 + len(self.ids)) / (1 + self.df)) + 1.0
+
+    def doc_tfidf(self):
+        """L2-normalised TF-IDF rows for every document (cached until the next update)."""
+        if "tfidf" not in self._cache:
+            self._cache["tfidf"] = _l2_rows(self.tf @ sp.diags(self.idf())).tocsr()
+        return self._cache["tfidf"]
+
+    def query_tfidf(self, texts):
+        return _l2_rows(self._count_rows(texts, grow=False) @ sp.diags(self.idf())).tocsr()
+
+    def tfidf_pair_scores(self, query_texts, q_idx, doc_ids):
+        """
+        Cosine similarity for each pair (query_texts[q_idx[i]], doc_ids[i]), computed as one
+        row-wise sparse product. Documents missing from the index score 0.
+        """
+        q = self.query_tfidf(query_texts)
+        rows = np.array([self.row.get(d, -1) for d in doc_ids], dtype=np.int64)
+        found = rows >= 0
+        out = np.zeros(len(rows), dtype=np.float64)
+        if found.any():
+            q_idx = np.asarray(q_idx)[found]
+            out[found] = np.asarray(q[q_idx].multiply(self.doc_tfidf()[rows[found]]).sum(axis=1)).ravel()
+        return out
+
+    def tfidf_scores(self, query_texts):
+        """(n_queries, n_docs) cosine similarities (sparse)."""
+        return (self.query_tfidf(query_texts) @ self.doc_tfidf().T).tocsr()
+
+    def bm25_weights(self, k1=BM25_K1, b=BM25_B):
+        """Per (doc, term) BM25 contributions, cached until the next update."""
+        key = ("bm25", k1, b)
+        if key not in self._cache:
+            n = len(self.ids)
+            idf = np.log(1.0 + (n - self.df + 0.5) / (self.df + 0.5))
+            dl = np.asarray(self.tf.sum(axis=1)).ravel()
+            norm = k1 * (1 - b + b * dl / max(dl.mean(), 1e-12)) if n else dl
+            w = self.tf.tocoo()
+            data = w.data * (k1 + 1) / (w.data + norm[w.row]) * idf[w.col]
+            self._cache[key] = sp.csr_matrix((data, (w.row, w.col)), shape=self.tf.shape)
+        return self._cache[key]
+
+    def bm25_scores(self, query_texts, k1=BM25_K1, b=BM25_B):
+        """(n_queries, n_docs) BM25 scores (sparse); each query term counts once."""
+        q = self._count_rows(query_texts, grow=False)
+        q.data[:] = 1.0
+        return (q @ self.bm25_weights(k1, b).T).tocsr()
+
+def open_lexical_index(actions=None, path=LEXICAL_PATH):
+    """Load the persisted index, syncing it with the given action records first if any differ."""
+    idx = LexicalIndex.load(path)
+    if actions is not None:
+        stats = idx.update([a["action_id"] for a in actions], [a["text"] for a in actions])
+        if stats["added"] or stats["changed"] or stats["deleted"]:
+            idx.save(path)
+            print(f"[INFO] Lexical index: +{stats['added']} added, ~{stats['changed']} changed, "
+                  f"-{stats['deleted']} deleted, {stats['unchanged']} unchanged")
+    return idx
@@ -0,0 +1,132 @@
+# src/onnx_encoder.py
+#
+# ONNX Runtime backend for the sentence embedding model, for CPU-only hosts.
+# The Hugging Face transformer is exported to ONNX once (and optionally
+# dynamically quantized to int8), then run with onnxruntime. Pooling matches the
+# SentenceTransformer pipeline of all-MiniLM-L6-v2: mean over the attention
+# mask followed by L2 normalisation.
+#
+# The export and quantization write to temporary files that are renamed into place
+# under a lock on <model dir>.lock, so concurrent processes never load a half-written
+# model; EncodingPool runs ensure_onnx_model() once before starting its workers.
+
+from pathlib import Path
+import os
+import re
+import shutil
+import numpy as np
+
+from config import EMBED_MODEL, ONNX_MODEL_PATH
+from file_lock import file_lock
+
+MAX_SEQ_LENGTH = 256   # all-MiniLM-L6-v2's max_seq_length in sentence-transformers
+OPSET = 17
+
+def model_dir(model_name=EMBED_MODEL, root=ONNX_MODEL_PATH):
+    return Path(root) / re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name)
+
+def export_onnx(model_name, out_dir: Path):
+    """Export the transformer (token embeddings out) plus its tokenizer to out_dir."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self, m):
+            super().__init__()
+            self.m = m
+
+        def forward(self, input_ids, attention_mask, token_type_ids=None):
+            return self.m(input_ids=input_ids, attention_mask=attention_mask,
+                          token_type_ids=token_type_ids).last_hidden_state
+
+    sample = tokenizer(["export sample text"], return_tensors="pt")
+    names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    dynamic = {n: {0: "batch", 1: "seq"} for n in names + ["last_hidden_state"]}
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(model),
+            tuple(sample[n] for n in names),
+            str(out_dir / "model.onnx"),
+            input_names=names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic,
+            opset_version=OPSET,
+            dynamo=False,
+        )
+    tokenizer.save_pretrained(out_dir)
+
+def quantize_int8(fp32_path: Path, int8_path: Path):
+    # needs the `onnx` package alongside onnxruntime
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+
+def ensure_onnx_model(model_name=EMBED_MODEL, quantized=False):
+    """Path of the (int8) ONNX model, exporting / quantizing it first if it is missing."""
+    d = model_dir(model_name)
+    fp32 = d / "model.onnx"
+    path = d / "model.int8.onnx" if quantized else fp32
+    if path.exists():
+        return path
+    with file_lock(d.with_name(d.name + ".lock")):
+        # another process may have finished while we waited for the lock
+        if not fp32.exists():
+            print(f"[INFO] Exporting {model_name} to ONNX -> {fp32}")
+            tmp = d.with_name(f"{d.name}.tmp-{os.getpid()}")
+            shutil.rmtree(tmp, ignore_errors=True)
+            export_onnx(model_name, tmp)
+            d.mkdir(parents=True, exist_ok=True)
+            # tokenizer files first, model.onnx last: its presence marks a complete export
+            for f in tmp.iterdir():
+                if f.name != "model.onnx":
+                    os.replace(f, d / f.name)
+            os.replace(tmp / "model.onnx", fp32)
+            shutil.rmtree(tmp, ignore_errors=True)
+        if quantized and not path.exists():
+            print(f"[INFO] Quantizing to int8 -> {path}")
+            tmp = path.with_name(f"{path.stem}.tmp-{os.getpid()}.onnx")
+            quantize_int8(fp32, tmp)
+            os.replace(tmp, path)
+    return path
+
+class OnnxEncoder:
+    """Drop-in for SentenceTransformer.encode() on CPU, backed by onnxruntime."""
+
+    def __init__(self, model_name=EMBED_MODEL, quantized=False, threads=None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        d = model_dir(model_name)
+        path = ensure_onnx_model(model_name, quantized)
+
+        opts = ort.SessionOptions()
+        if threads:
+            opts.intra_op_num_threads = threads
+            opts.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(str(path), opts, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(d)
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False, **kwargs):
+        texts = list(texts)
+        out = None
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        for i in range(0, len(order), batch_size):
+            idx = order[i:i + batch_size]
+            enc = self.tokenizer([texts[j] for j in idx], padding=True, truncation=True,
+                                 max_length=MAX_SEQ_LENGTH, return_tensors="np")
+            feeds = {n: enc[n].astype(np.int64) for n in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+
+            mask = enc["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+            if out is None:
+                out = np.empty((len(texts), pooled.shape[1]), dtype=np.float32)
+            out[idx] = pooled
+        return out if out is not None else np.zeros((0, 0), dtype=np.float32)
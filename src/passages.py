@@ -0,0 +1,47 @@
+# src/passages.py
+#
+# Multi-vector strategy queries.
+# A goal section is far longer than MiniLM's 256-token window, so a single
+# embedding only sees its opening. Strategies are split into overlapping word
+# windows, every passage of every strategy is encoded in one batch, and
+# passage-level similarities are folded back to one score per strategy.
+
+import numpy as np
+
+from config import PASSAGE_WORDS, PASSAGE_OVERLAP
+
+def split_passages(text, words=PASSAGE_WORDS, overlap=PASSAGE_OVERLAP):
+    """Overlapping windows of `words` words (a short text is a single passage)."""
+    tokens = (text or "").split()
+    if len(tokens) <= words:
+        return [" ".join(tokens)]
+    step = max(words - overlap, 1)
+    out = []
+    for start in range(0, len(tokens), step):
+        out.append(" ".join(tokens[start:start + words]))
+        if start + words >= len(tokens):
+            break
+    return out
+
+def passage_batch(texts, words=PASSAGE_WORDS, overlap=PASSAGE_OVERLAP):
+    """
+    Flatten the passages of every text into one list.
+    Returns (passages, starts): passages of text i are passages[starts[i]:starts[i+1]].
+    """
+    passages, starts = [], []
+    for t in texts:
+        starts.append(len(passages))
+        passages.extend(split_passages(t, words, overlap))
+    return passages, np.array(starts, dtype=np.int64)
+
+def aggregate(scores, starts, how="max"):
+    """
+    (n_passages, n_items) similarities -> (n_texts, n_items), reducing each
+    text's block of consecutive passage rows with max or mean.
+    """
+    if how == "max":
+        return np.maximum.reduceat(scores, starts, axis=0)
+    if how == "mean":
+        counts = np.diff(np.append(starts, len(scores)))
+        return np.add.reduceat(scores, starts, axis=0) / counts[:, None]
+    raise ValueError(f"Unsupported passage aggregation={how} (choose max or mean)")
@@ -0,0 +1,81 @@
+# src/pdf_backends.py
+#
+# Page-text extraction backends used by 01_extract_text.py.
+# Each backend's library is imported lazily so only the selected one has to be installed.
+
+DEFAULT_BACKEND = "pypdf"
+BACKENDS = ("pypdf", "pypdfium2", "pdfplumber")
+
+def _pypdf_pages(pdf_path: str, page_indices):
+    from pypdf import PdfReader
+    reader = PdfReader(pdf_path)
+    for i in page_indices:
+        yield i, reader.pages[i].extract_text() or ""
+
+def _pypdfium2_pages(pdf_path: str, page_indices):
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        for i in page_indices:
+            page = pdf[i]
+            textpage = page.get_textpage()
+            text = textpage.get_text_range() or ""
+            textpage.close()
+            page.close()
+            # pdfium uses CRLF line breaks; the downstream regexes expect "\n"
+            yield i, text.replace("\r\n", "\n").replace("\r", "\n")
+    finally:
+        pdf.close()
+
+def _pdfplumber_pages(pdf_path: str, page_indices):
+    import pdfplumber
+    with pdfplumber.open(pdf_path) as pdf:
+        for i in page_indices:
+            page = pdf.pages[i]
+            text = page.extract_text() or ""
+            # drop cached layout objects so memory stays flat on long documents
+            page.flush_cache()
+            yield i, text
+
+_EXTRACTORS = {
+    "pypdf": _pypdf_pages,
+    "pypdfium2": _pypdfium2_pages,
+    "pdfplumber": _pdfplumber_pages,
+}
+
+def _pypdf_count(pdf_path: str):
+    from pypdf import PdfReader
+    return len(PdfReader(pdf_path).pages)
+
+def _pypdfium2_count(pdf_path: str):
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+def _pdfplumber_count(pdf_path: str):
+    import pdfplumber
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+_COUNTERS = {
+    "pypdf": _pypdf_count,
+    "pypdfium2": _pypdfium2_count,
+    "pdfplumber": _pdfplumber_count,
+}
+
+def _check_backend(backend):
+    if backend not in _EXTRACTORS:
+        raise ValueError(f"Unsupported PDF backend={backend} (choose from {', '.join(BACKENDS)})")
+
+def page_count(pdf_path: str, backend: str = DEFAULT_BACKEND) -> int:
+    """Number of pages, read with the chosen backend's own library."""
+    _check_backend(backend)
+    return _COUNTERS[backend](pdf_path)
+
+def extract_texts(pdf_path: str, page_indices, backend: str = DEFAULT_BACKEND):
+    """Return [(page_index, text), ...] for the given pages using the chosen backend."""
+    _check_backend(backend)
+    return list(_EXTRACTORS[backend](pdf_path, page_indices))
@@ -0,0 +1,99 @@
+# src/reranker.py
+#
+# Optional cross-encoder rerank stage with an on-disk pair-score cache.
+# All (strategy, action) pairs of a run go through the model in large batches;
+# scores are stored in sqlite keyed by (model, strategy text hash, action text hash),
+# so after a small edit only the pairs whose text changed are scored again.
+
+from pathlib import Path
+import hashlib
+import sqlite3
+import time
+import numpy as np
+
+from config import RERANK_MODEL, RERANK_BATCH, RERANK_CACHE_PATH
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+class PairScoreCache:
+    LOOKUP_CHUNK = 400   # keeps each IN (...) query under sqlite's parameter limit
+
+    def __init__(self, path=RERANK_CACHE_PATH, model_name=RERANK_MODEL):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.model_name = model_name
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pair_scores ("
+            " model TEXT NOT NULL, q_hash TEXT NOT NULL, d_hash TEXT NOT NULL, score REAL NOT NULL,"
+            " PRIMARY KEY (model, q_hash, d_hash))"
+        )
+
+    def get_many(self, keys):
+        """{(q_hash, d_hash): score} for the keys that are cached."""
+        found = {}
+        keys = list(keys)
+        for i in range(0, len(keys), self.LOOKUP_CHUNK):
+            chunk = keys[i:i + self.LOOKUP_CHUNK]
+            where = " OR ".join(["(q_hash = ? AND d_hash = ?)"] * len(chunk))
+            params = [self.model_name] + [h for key in chunk for h in key]
+            for q, d, s in self.conn.execute(
+                f"SELECT q_hash, d_hash, score FROM pair_scores WHERE model = ? AND ({where})", params
+            ):
+                found[(q, d)] = s
+        return found
+
+    def put_many(self, items):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO pair_scores (model, q_hash, d_hash, score) VALUES (?, ?, ?, ?)",
+                [(self.model_name, q, d, float(s)) for (q, d), s in items],
+            )
+
+    def close(self):
+        self.conn.close()
+
+class CrossEncoderReranker:
+    """
+    rr = CrossEncoderReranker()
+    scores = rr.score_pairs(query_texts, doc_texts)   # one score per pair, same order
+    rr.stats   # {"pairs", "cached", "scored", "model_seconds"}
+    """
+
+    def __init__(self, model_name=RERANK_MODEL, batch_size=RERANK_BATCH, cache=None):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.cache = cache if cache is not None else PairScoreCache(model_name=model_name)
+        self._model = None
+        self.stats = {"pairs": 0, "cached": 0, "scored": 0, "model_seconds": 0.0}
+
+    def model(self):
+        if self._model is None:
+            from sentence_transformers import CrossEncoder
+            self._model = CrossEncoder(self.model_name, device="cpu")
+        return self._model
+
+    def score_pairs(self, query_texts, doc_texts):
+        keys = [(text_hash(q), text_hash(d)) for q, d in zip(query_texts, doc_texts)]
+        scores = self.cache.get_many(set(keys))
+
+        todo = {}
+        for key, q, d in zip(keys, query_texts, doc_texts):
+            if key not in scores and key not in todo:
+                todo[key] = (q, d)
+
+        if todo:
+            t0 = time.perf_counter()
+            new = self.model().predict(list(todo.values()), batch_size=self.batch_size, show_progress_bar=False)
+            self.stats["model_seconds"] += time.perf_counter() - t0
+            new = dict(zip(todo.keys(), np.asarray(new, dtype=np.float64).ravel().tolist()))
+            self.cache.put_many(new.items())
+            scores.update(new)
+
+        self.stats["pairs"] += len(keys)
+        self.stats["scored"] += len(todo)
+        self.stats["cached"] += len(keys) - len(todo)
+        return np.array([scores[k] for k in keys], dtype=np.float64)
+
+    def pairs_per_second(self):
+        return self.stats["scored"] / self.stats["model_seconds"] if self.stats["model_seconds"] else float("nan")
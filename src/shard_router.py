@@ -0,0 +1,132 @@
+# src/shard_router.py
+#
+# One Chroma shard per council / plan, and a router that queries them together.
+#
+#   <SHARDS_PATH>/shards.json           registry: [{"name", "council", "plan", "path"}, ...]
+#   <SHARDS_PATH>/<council>__<plan>/    a Chroma directory holding that plan's actions collection
+#
+# Each shard is built and re-synced independently (04e_build_shard.py). The router
+# sends a query to every shard concurrently and merges the per-shard top-k lists
+# into a global top-k with a bounded heap.
+
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import json
+import re
+import time
+import chromadb
+
+from config import ACTIONS_COLLECTION, SHARDS_PATH, SHARD_WORKERS, dist_to_sim
+
+REGISTRY_NAME = "shards.json"
+
+def slug(text):
+    return re.sub(r"[^a-z0-9]+", "-", str(text).lower()).strip("-")
+
+def shard_name(council, plan):
+    return f"{slug(council)}__{slug(plan)}"
+
+def load_registry(root=SHARDS_PATH):
+    p = Path(root) / REGISTRY_NAME
+    if not p.exists():
+        return []
+    return json.loads(p.read_text(encoding="utf-8"))
+
+def register_shard(council, plan, root=SHARDS_PATH):
+    """Add (or refresh) a shard entry and return it; the shard's directory is <root>/<name>."""
+    name = shard_name(council, plan)
+    entry = {"name": name, "council": council, "plan": plan, "path": str(Path(root) / name)}
+    shards = [s for s in load_registry(root) if s["name"] != name] + [entry]
+    p = Path(root) / REGISTRY_NAME
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_suffix(".tmp")
+    tmp.write_text(json.dumps(sorted(shards, key=lambda s: s["name"]), indent=2), encoding="utf-8")
+    tmp.replace(p)
+    return entry
+
+class ShardRouter:
+    """
+    router = ShardRouter()
+    hits = router.query(query_vectors, k=10, where={"goal_no": 1})   # per query: merged top-k
+    router.last_latency    # {shard_name: seconds} for the last call
+
+    Every hit is {"shard", "council", "plan", "id", "document", "metadata", "distance", "similarity"}.
+    Distances from different shards are comparable because every shard uses the same
+    embedding model and distance space.
+    """
+
+    def __init__(self, root=SHARDS_PATH, workers=SHARD_WORKERS, shards=None):
+        self.shards = [s for s in load_registry(root) if shards is None or s["name"] in shards]
+        if not self.shards:
+            raise FileNotFoundError(f"No shards registered under {root} (build them with 04e_build_shard.py)")
+        self.workers = workers or len(self.shards)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        # clients are opened up front so per-shard latency measures the query itself
+        self._cols = {}
+        for shard in self.shards:
+            self.collection(shard)
+        self.last_latency = {}
+        self.total_latency = {s["name"]: 0.0 for s in self.shards}
+        self.calls = 0
+
+    def collection(self, shard):
+        name = shard["name"]
+        if name not in self._cols:
+            client = chromadb.PersistentClient(path=shard["path"])
+            self._cols[name] = client.get_collection(name=ACTIONS_COLLECTION, embedding_function=None)
+        return self._cols[name]
+
+    def _query_shard(self, shard, query_embeddings, k, where):
+        t0 = time.perf_counter()
+        col = self.collection(shard)
+        res = col.query(
+            query_embeddings=query_embeddings,
+            n_results=k,
+            where=where,
+            include=["documents", "metadatas", "distances"]
+        )
+        return shard, res, time.perf_counter() - t0
+
+    def query(self, query_embeddings, k=10, where=None):
+        """Merged top-k over all shards for each query vector (list of hit lists)."""
+        query_embeddings = [list(map(float, q)) for q in query_embeddings]
+        parts = list(self._pool.map(lambda s: self._query_shard(s, query_embeddings, k, where), self.shards))
+
+        self.last_latency = {}
+        for shard, _, seconds in parts:
+            self.last_latency[shard["name"]] = seconds
+            self.total_latency[shard["name"]] += seconds
+        self.calls += 1
+
+        merged = []
+        for qi in range(len(query_embeddings)):
+            def hits():
+                for shard, res, _ in parts:
+                    for aid, doc, meta, dist in zip(res["ids"][qi], res["documents"][qi],
+                                                    res["metadatas"][qi], res["distances"][qi]):
+                        yield dist, shard, aid, doc, meta
+            # nsmallest keeps a heap of at most k entries while streaming every shard's hits
+            best = heapq.nsmallest(k, hits(), key=lambda h: (h[0], h[1]["name"], h[2]))
+            merged.append([{
+                "shard": shard["name"],
+                "council": shard["council"],
+                "plan": shard["plan"],
+                "id": aid,
+                "document": doc,
+                "metadata": meta,
+                "distance": float(dist),
+                "similarity": float(dist_to_sim(dist)),
+            } for dist, shard, aid, doc, meta in best])
+        return merged
+
+    def close(self):
+        self._pool.shutdown()
+
+    def latency_report(self):
+        """One line per shard, slowest first: last call and average over all calls (ms)."""
+        lines = []
+        for name, sec in sorted(self.last_latency.items(), key=lambda x: -x[1]):
+            avg = 1000 * self.total_latency[name] / max(self.calls, 1)
+            lines.append(f"{name:<40}{1000 * sec:>9.1f} ms   (avg {avg:.1f} ms over {self.calls} calls)")
+        return "\n".join(lines)
@@ -0,0 +1,196 @@
+# src/vector_compress.py
+#
+# Compressed storage for action embeddings.
+#   sq8: per-dimension int8 scalar quantization          (4x smaller than float32)
+#   pq:  product quantization, m sub-vectors x 256 codes  (384-d: m=96 -> 16x, m=48 -> 32x)
+# Search scores every row from the codes, keeps a shortlist, and re-scores the
+# shortlist with the full-precision vectors, which stay on disk (memory-mapped).
+
+from pathlib import Path
+import json
+import numpy as np
+
+from config import COMPRESSED_PATH
+
+KMEANS_ITERS = 20
+PQ_TRAIN_SAMPLE = 10000  # rows used to train the PQ codebooks (all rows are still encoded)
+SHORTLIST_FACTOR = 10   # shortlist = k * factor rows re-scored in full precision
+SCORE_BLOCK = 16384     # code rows widened to float32 at a time when scoring sq8
+
+def normalize(x):
+    x = np.asarray(x, dtype=np.float32)
+    return x / np.clip(np.linalg.norm(x, axis=1, keepdims=True), 1e-12, None)
+
+class ScalarQuantizer:
+    """x ~= lo + scale * (code + 128), one (lo, scale) per dimension."""
+
+    def fit(self, x):
+        self.lo = x.min(axis=0).astype(np.float32)
+        self.scale = np.maximum((x.max(axis=0) - self.lo) / 255.0, 1e-12).astype(np.float32)
+        return self
+
+    def encode(self, x):
+        q = np.rint((x - self.lo) / self.scale) - 128
+        return np.clip(q, -128, 127).astype(np.int8)
+
+    def decode(self, codes):
+        return self.lo + self.scale * (codes.astype(np.float32) + 128)
+
+    def scores(self, codes, q):
+        """
+        (n, n_queries) dot products with the decoded vectors, without materialising them.
+        The +128 offset and lo are folded into a per-query bias, and codes are widened
+        SCORE_BLOCK rows at a time, so the only float copy is one block.
+        """
+        qs = (q * self.scale).astype(np.float32)
+        bias = 128.0 * qs.sum(axis=1) + q @ self.lo
+        out = np.empty((len(codes), len(q)), dtype=np.float32)
+        for i in range(0, len(codes), SCORE_BLOCK):
+            out[i:i + SCORE_BLOCK] = codes[i:i + SCORE_BLOCK].astype(np.float32) @ qs.T
+        out += bias[None, :]
+        return out
+
+    def state(self):
+        return {"lo": self.lo, "scale": self.scale}
+
+    def load(self, st):
+        self.lo, self.scale = st["lo"], st["scale"]
+        return self
+
+def kmeans(x, k, iters=KMEANS_ITERS, seed=0):
+    rng = np.random.default_rng(seed)
+    centroids = x[rng.choice(len(x), size=k, replace=False)].copy()
+    for _ in range(iters):
+        d = (x * x).sum(1)[:, None] - 2 * x @ centroids.T + (centroids * centroids).sum(1)[None, :]
+        assign = d.argmin(axis=1)
+        counts = np.bincount(assign, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, x)
+        nonempty = counts > 0
+        centroids[nonempty] = sums[nonempty] / counts[nonempty, None]
+    return centroids.astype(np.float32)
+
+class ProductQuantizer:
+    """m sub-spaces, up to 256 centroids each; one uint8 code per sub-space."""
+
+    def __init__(self, m=96):
+        self.m = m
+
+    def fit(self, x):
+        n, dim = x.shape
+        if dim % self.m:
+            raise ValueError(f"dim={dim} is not divisible by m={self.m}")
+        self.dsub = dim // self.m
+        if n > PQ_TRAIN_SAMPLE:
+            x = x[np.random.default_rng(0).choice(n, size=PQ_TRAIN_SAMPLE, replace=False)]
+        k = min(256, len(x))
+        self.codebooks = np.stack([
+            kmeans(x[:, j * self.dsub:(j + 1) * self.dsub], k, seed=j) for j in range(self.m)
+        ])  # (m, k, dsub)
+        return self
+
+    def encode(self, x):
+        codes = np.empty((len(x), self.m), dtype=np.uint8)
+        for j in range(self.m):
+            sub = x[:, j * self.dsub:(j + 1) * self.dsub]
+            cb = self.codebooks[j]
+            d = (sub * sub).sum(1)[:, None] - 2 * sub @ cb.T + (cb * cb).sum(1)[None, :]
+            codes[:, j] = d.argmin(axis=1)
+        return codes
+
+    def decode(self, codes):
+        return np.concatenate([self.codebooks[j][codes[:, j]] for j in range(self.m)], axis=1)
+
+    def scores(self, codes, q):
+        """(n, n_queries) via asymmetric distance computation: per-query lookup tables summed over sub-spaces."""
+        out = np.zeros((len(codes), len(q)), dtype=np.float32)
+        for j in range(self.m):
+            table = self.codebooks[j] @ q[:, j * self.dsub:(j + 1) * self.dsub].T   # (k, n_queries)
+            out += table[codes[:, j]]
+        return out
+
+    def state(self):
+        return {"m": np.array(self.m), "codebooks": self.codebooks}
+
+    def load(self, st):
+        self.m = int(st["m"])
+        self.codebooks = st["codebooks"]
+        self.dsub = self.codebooks.shape[2]
+        return self
+
+def make_quantizer(method, m=96):
+    if method == "sq8":
+        return ScalarQuantizer()
+    if method == "pq":
+        return ProductQuantizer(m)
+    raise ValueError(f"Unsupported compression method={method}")
+
+class CompressedStore:
+    """
+    store = CompressedStore.build(ids, vectors, "pq", m=96)
+    store.save("db_compressed/actions_pq"); store = CompressedStore.load("db_compressed/actions_pq")
+    ids, sims = store.search(query_vectors, k=10)
+
+    Vectors are L2-normalised, so scores are cosine similarities.
+    """
+
+    def __init__(self, ids, method, quantizer, codes, full):
+        self.ids = list(ids)
+        self.method = method
+        self.quantizer = quantizer
+        self.codes = codes
+        self.full = full          # (n, dim) float32; a memmap when loaded from disk
+
+    @classmethod
+    def build(cls, ids, vectors, method="sq8", m=96):
+        x = normalize(vectors)
+        q = make_quantizer(method, m).fit(x)
+        return cls(ids, method, q, q.encode(x), x)
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.savez(path / "codes.npz", codes=self.codes, **self.quantizer.state())
+        full = np.memmap(path / "full.f32", dtype=np.float32, mode="w+", shape=self.full.shape)
+        full[:] = self.full
+        full.flush()
+        meta = {"method": self.method, "ids": self.ids, "dim": int(self.full.shape[1])}
+        (path / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        st = np.load(path / "codes.npz")
+        q = make_quantizer(meta["method"]).load(st)
+        full = np.memmap(path / "full.f32", dtype=np.float32, mode="r", shape=(len(meta["ids"]), meta["dim"]))
+        return cls(meta["ids"], meta["method"], q, st["codes"], full)
+
+    def memory_bytes(self):
+        """Resident size of the codes + codebooks (the full vectors stay on disk)."""
+        return self.codes.nbytes + sum(np.asarray(v).nbytes for v in self.quantizer.state().values())
+
+    def search(self, queries, k=10, shortlist=None):
+        """Top-k (ids, cosine sims) per query; approximate scan, exact re-score of the shortlist."""
+        q = normalize(np.atleast_2d(queries))
+        n = len(self.ids)
+        k = min(k, n)
+        shortlist = min(n, shortlist or k * SHORTLIST_FACTOR)
+
+        approx = self.quantizer.scores(self.codes, q).T          # (n_queries, n)
+        if shortlist < n:
+            cand = np.argpartition(-approx, shortlist - 1, axis=1)[:, :shortlist]
+        else:
+            cand = np.tile(np.arange(n), (len(q), 1))
+
+        out_ids, out_sims = [], []
+        for qi in range(len(q)):
+            rows = np.sort(cand[qi])
+            exact = np.asarray(self.full[rows]) @ q[qi]
+            top = np.argsort(-exact, kind="stable")[:k]
+            out_ids.append([self.ids[r] for r in rows[top]])
+            out_sims.append(exact[top])
+        return out_ids, np.array(out_sims)
+
+def store_path(method, root=COMPRESSED_PATH):
+    return Path(root) / f"actions_{method}"
@@ -0,0 +1,249 @@
+# src/vector_index.py
+#
+# Keep the Chroma collections in sync with strategies.jsonl / actions.jsonl.
+# Instead of dropping and re-adding everything, the stored records are diffed
+# against the source records and only the differing IDs are touched.
+
+from pathlib import Path
+import time
+import uuid
+import numpy as np
+
+from config import HNSW_PROFILE, HNSW_PROFILES
+
+BATCH = 200
+FETCH_PAGE = 1000
+# Written into the Chroma directory whenever a script changes a collection;
+# query-side caches compare it to decide whether their results are stale.
+INDEX_VERSION_FILE = "index_version"
+
+def action_metadata(a):
+    meta = {
+        "action_id": a["action_id"],
+        "goal_no": a.get("goal_no"),
+        "csp_ref": a.get("csp_ref"),
+        "service": a.get("service"),
+        "delivery_stream": a.get("delivery_stream"),
+        "page_index": a.get("page_index"),
+        "source_doc": a.get("source_doc"),
+    }
+    # Chroma rejects None metadata values
+    return {k: v for k, v in meta.items() if v is not None}
+
+def strategy_metadata(s):
+    meta = {"goal_no": s.get("goal_no"), "title": s.get("title"), "source_doc": s.get("source_doc")}
+    return {k: v for k, v in meta.items() if v is not None}
+
+def hnsw_configuration(profile=HNSW_PROFILE, space="l2"):
+    """Chroma collection configuration for a profile name or an {"M", "ef_construction", "ef_search"} dict."""
+    p = HNSW_PROFILES[profile] if isinstance(profile, str) else profile
+    return {"hnsw": {"space": space, "max_neighbors": p["M"],
+                     "ef_construction": p["ef_construction"], "ef_search": p["ef_search"]}}
+
+def write_records(op, ids, metadatas=None, documents=None, embeddings=None):
+    """
+    col.add / col.update / col.upsert that never lets Chroma embed anything.
+    Opening a collection with embedding_function=None does not detach the default
+    embedding function persisted with collections created before we passed our own
+    vectors, so documents written without embeddings would be embedded with it.
+    """
+    if documents is not None and embeddings is None:
+        raise ValueError("documents must be written together with their embeddings")
+    kwargs = {"ids": ids}
+    if metadatas is not None:
+        kwargs["metadatas"] = metadatas
+    if documents is not None:
+        kwargs["documents"] = documents
+    if embeddings is not None:
+        kwargs["embeddings"] = embeddings
+    op(**kwargs)
+
+def open_collection(client, name, profile=HNSW_PROFILE):
+    """
+    get_or_create_collection with the profile's HNSW settings. New collections get no
+    embedding function; an older one may still carry Chroma's persisted default, so
+    every write goes through write_records, which always supplies the vectors.
+    An existing collection gets the profile's ef_search (used from the next time the
+    index is loaded, i.e. by the following scripts); if it was built with a different
+    M / ef_construction a warning is printed, since those need a rebuild.
+    """
+    want = hnsw_configuration(profile)["hnsw"]
+    col = client.get_or_create_collection(name=name, embedding_function=None, configuration={"hnsw": want})
+    have = col.configuration.get("hnsw") or {}
+    if have.get("ef_search") != want["ef_search"]:
+        col.modify(configuration={"hnsw": {"ef_search": want["ef_search"]}})
+    if (have.get("max_neighbors"), have.get("ef_construction")) != (want["max_neighbors"], want["ef_construction"]):
+        print(f"[WARN] {name} was built with M={have.get('max_neighbors')}, "
+              f"ef_construction={have.get('ef_construction')}; profile asks for M={want['max_neighbors']}, "
+              f"ef_construction={want['ef_construction']} (rebuild with 04c --full to apply)")
+    return col
+
+def read_index_version(chroma_path):
+    p = Path(chroma_path) / INDEX_VERSION_FILE
+    return p.read_text(encoding="utf-8").strip() if p.exists() else None
+
+def bump_index_version(chroma_path):
+    p = Path(chroma_path) / INDEX_VERSION_FILE
+    p.parent.mkdir(parents=True, exist_ok=True)
+    version = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+    p.write_text(version, encoding="utf-8")
+    return version
+
+def delta_changed(delta):
+    return bool(delta["added"] or delta["reembed"] or delta["patched"] or delta["deleted"])
+
+def delta_summary(name, delta):
+    return (f"[{name}] +{len(delta['added'])} added, ~{len(delta['reembed'])} re-embedded, "
+            f"~{len(delta['patched'])} metadata-only, -{len(delta['deleted'])} deleted, "
+            f"{delta['unchanged']} unchanged")
+
+def fetch_all(col, include=("documents", "metadatas"), page=FETCH_PAGE):
+    """id -> {"document", "metadata"[, "embedding"]} for every stored record, fetched page by page."""
+    stored = {}
+    offset = 0
+    while True:
+        res = col.get(include=list(include), limit=page, offset=offset)
+        ids = res["ids"]
+        if not ids:
+            break
+        for j, rid in enumerate(ids):
+            rec = {}
+            if "documents" in include:
+                rec["document"] = res["documents"][j]
+            if "metadatas" in include:
+                rec["metadata"] = res["metadatas"][j] or {}
+            if "embeddings" in include:
+                rec["embedding"] = res["embeddings"][j]
+            stored[rid] = rec
+        offset += len(ids)
+    return stored
+
+def replacement_metadata(new, old):
+    """
+    new as a full replacement for old. col.update merges metadata key by key, and a
+    None value deletes a key, so keys that are gone from new are sent as None.
+    """
+    out = dict(new)
+    out.update({k: None for k in old if k not in new})
+    return out
+
+def diff_collection(col, ids, docs, metas):
+    """
+    Compare source records with what col stores. Returns a dict of ID lists:
+    added (new), reembed (text changed), patched (metadata changed only),
+    deleted (gone from the source), plus the unchanged count and, for reembed and
+    patched IDs, the stored metadata (old_metadata) that the update replaces.
+    """
+    stored = fetch_all(col)
+    delta = {"added": [], "reembed": [], "patched": [], "deleted": [], "unchanged": 0, "old_metadata": {}}
+    wanted = set(ids)
+
+    for rid, doc, meta in zip(ids, docs, metas):
+        old = stored.get(rid)
+        if old is None:
+            delta["added"].append(rid)
+            continue
+        if old["document"] != doc:
+            delta["reembed"].append(rid)
+        elif old["metadata"] != meta:
+            delta["patched"].append(rid)
+        else:
+            delta["unchanged"] += 1
+            continue
+        delta["old_metadata"][rid] = old["metadata"]
+
+    delta["deleted"] = [rid for rid in stored if rid not in wanted]
+    return delta
+
+def sync_collection(col, ids, docs, metas, embed_fn, batch=BATCH, name=None):
+    """
+    Bring col in line with (ids, docs, metas). embed_fn(list_of_texts) -> array of vectors
+    is only called for added or re-worded records. Returns the delta dict.
+    """
+    name = name or col.name
+    delta = diff_collection(col, ids, docs, metas)
+    by_id = {rid: (doc, meta) for rid, doc, meta in zip(ids, docs, metas)}
+
+    for i in range(0, len(delta["deleted"]), batch):
+        col.delete(ids=delta["deleted"][i:i+batch])
+
+    def new_meta(rid):
+        return replacement_metadata(by_id[rid][1], delta["old_metadata"].get(rid, {}))
+
+    for op, todo in ((col.add, delta["added"]), (col.update, delta["reembed"])):
+        for i in range(0, len(todo), batch):
+            b_ids = todo[i:i+batch]
+            b_docs = [by_id[rid][0] for rid in b_ids]
+            write_records(
+                op,
+                ids=b_ids,
+                documents=b_docs,
+                metadatas=[new_meta(rid) for rid in b_ids],
+                embeddings=embed_fn(b_docs).tolist(),
+            )
+
+    # metadata only: no documents passed, so nothing is (re-)embedded
+    for i in range(0, len(delta["patched"]), batch):
+        b_ids = delta["patched"][i:i+batch]
+        write_records(col.update, ids=b_ids, metadatas=[new_meta(rid) for rid in b_ids])
+
+    print(delta_summary(name, delta))
+    return delta
+
+def patch_collection(col, ids, metas, docs=None, batch=BATCH, verify=True):
+    """
+    Metadata (and optionally document) patch that never computes embeddings.
+
+    Document text is written back together with the vector already stored for
+    that ID, so Chroma has nothing to embed; records whose wording changed and
+    need new vectors should go through sync_collection instead. IDs that are not
+    stored are skipped. With verify=True the stored vectors are re-read afterwards
+    and compared with the originals.
+
+    Returns {"patched", "missing", "seconds", "vectors_unchanged"}.
+    """
+    t0 = time.perf_counter()
+    patched = 0
+    missing = []
+    before = {}
+
+    for i in range(0, len(ids), batch):
+        b_ids = ids[i:i+batch]
+        res = col.get(ids=b_ids, include=["embeddings", "metadatas"])
+        stored = {rid: emb for rid, emb in zip(res["ids"], res["embeddings"])}
+        old_metas = {rid: m or {} for rid, m in zip(res["ids"], res["metadatas"])}
+
+        keep = [j for j, rid in enumerate(b_ids) if rid in stored]
+        missing.extend(rid for rid in b_ids if rid not in stored)
+        if not keep:
+            continue
+
+        p_ids = [b_ids[j] for j in keep]
+        p_metas = [replacement_metadata(metas[i + j], old_metas[b_ids[j]]) for j in keep]
+        if docs is None:
+            write_records(col.update, ids=p_ids, metadatas=p_metas)
+        else:
+            write_records(
+                col.update,
+                ids=p_ids,
+                metadatas=p_metas,
+                documents=[docs[i + j] for j in keep],
+                embeddings=[stored[rid] for rid in p_ids],
+            )
+        if verify:
+            before.update((rid, stored[rid]) for rid in p_ids)
+        patched += len(p_ids)
+
+    seconds = time.perf_counter() - t0
+
+    unchanged = None
+    if verify:
+        unchanged = True
+        p_ids = list(before)
+        for i in range(0, len(p_ids), batch):
+            res = col.get(ids=p_ids[i:i+batch], include=["embeddings"])
+            for rid, emb in zip(res["ids"], res["embeddings"]):
+                if not np.array_equal(np.asarray(emb), np.asarray(before[rid])):
+                    unchanged = False
+
+    return {"patched": patched, "missing": missing, "seconds": seconds, "vectors_unchanged": unchanged}